@@ -0,0 +1,400 @@
+"""Offline benchmark for the video downloader.
+
+Starts a local HTTP server imitating the Google Drive download (uc?id=) and
+spreadsheet export endpoints, points main.py at it and measures:
+
+- full runs of VideoDownloader.download_videos on synthetic workbooks
+  (rows/s, MB/s, peak RSS)
+- the Drive download path on large files, single stream and segmented (MB/s)
+- resume behavior when connections drop mid-transfer, with and without
+  Range support (bytes served compared to the file size)
+
+Every case runs in a fresh process so peak RSS and the shared HTTP session
+are measured per case. Example:
+
+    python benchmark.py --rows 100 1000 10000 --file-size 64K --latency 20 --throttle 20M
+"""
+import os
+import sys
+import time
+import json
+import re
+import random
+import shutil
+import hashlib
+import tempfile
+import argparse
+import threading
+import logging
+import multiprocessing
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import main
+
+# Served file content: one pseudo-random block repeated, with a per-file header so files differ
+BLOCK = random.Random(0).randbytes(1024 * 1024)
+SEND_CHUNK = 64 * 1024
+SPREADSHEET_URL = "https://docs.google.com/spreadsheets/d/benchmark/edit"
+
+class MockDriveServer:
+    """Local stand-in for the Google Drive download and spreadsheet export endpoints.
+
+    file_size is the size served for every file ID (sizes overrides it per ID),
+    latency delays every response, throttle caps each connection in bytes/s,
+    ranges toggles Range support and fail_rate is the chance that a file's
+    first transfer is cut off after fail_after of its bytes.
+    """
+
+    def __init__(self, file_size=64 * 1024, latency=0.0, throttle=None, ranges=True, fail_rate=0.0,
+                 fail_after=0.5, seed=0):
+        self.file_size = file_size
+        self.sizes = {}
+        self.latency = latency
+        self.throttle = throttle
+        self.ranges = ranges
+        self.fail_rate = fail_rate
+        self.fail_after = fail_after
+        self.workbook = b''
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.failed_ids = set()
+        self.server = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {'requests': 0, 'range_requests': 0, 'bytes_served': 0, 'failures': 0}
+            self.failed_ids = set()
+
+    def count(self, **fields):
+        with self.lock:
+            for name, value in fields.items():
+                self.stats[name] += value
+
+    def should_fail(self, file_id):
+        """Cut off at most one transfer per file, with probability fail_rate."""
+        with self.lock:
+            if file_id in self.failed_ids or self.random.random() >= self.fail_rate:
+                return False
+            self.failed_ids.add(file_id)
+            self.stats['failures'] += 1
+            return True
+
+    def start(self):
+        """Serve on a free local port in a background thread and return the base URL."""
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _MockDriveHandler)
+        self.server.daemon_threads = True
+        self.server.drive = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+def file_content(file_id, start, end):
+    """Yield the bytes start..end (inclusive) of the mock file with this ID."""
+    header = hashlib.sha256(file_id.encode('utf-8')).digest()
+    position = start
+    while position <= end:
+        offset = position % len(BLOCK)
+        piece = BLOCK[offset:offset + min(SEND_CHUNK, end + 1 - position, len(BLOCK) - offset)]
+        if position < len(header):
+            piece = (header[position:] + piece[len(header) - position:])[:len(piece)]
+        yield piece
+        position += len(piece)
+
+class _MockDriveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        # Clients dropping a connection the server cut off is expected here
+        try:
+            super().handle()
+        except ConnectionError:
+            pass
+
+    def do_GET(self):
+        drive = self.server.drive
+        drive.count(requests=1)
+        if drive.latency:
+            time.sleep(drive.latency)
+
+        url = urlparse(self.path)
+        if url.path == '/uc':
+            file_id = parse_qs(url.query).get('id', [''])[0]
+            self.send_file(drive, file_id)
+        elif re.fullmatch(r'/spreadsheets/d/[^/]+/export', url.path):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+            self.send_header('Content-Length', str(len(drive.workbook)))
+            self.end_headers()
+            self.wfile.write(drive.workbook)
+        else:
+            self.send_error(404)
+
+    def send_file(self, drive, file_id):
+        size = drive.sizes.get(file_id, drive.file_size)
+        start, end = 0, size - 1
+
+        # Honour a single Range request if enabled
+        match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match and drive.ranges:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            drive.count(range_requests=1)
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        length = end + 1 - start
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(length))
+        self.send_header('Accept-Ranges', 'bytes' if drive.ranges else 'none')
+        self.end_headers()
+
+        # An injected failure announces the full length but drops the connection part way
+        limit = int(length * drive.fail_after) if length > 1 and drive.should_fail(file_id) else length
+        started = time.monotonic()
+        sent = 0
+        for piece in file_content(file_id, start, end):
+            piece = piece[:limit - sent]
+            if not piece:
+                break
+            try:
+                self.wfile.write(piece)
+            except OSError:
+                break
+            sent += len(piece)
+            drive.count(bytes_served=len(piece))
+            if drive.throttle:
+                delay = sent / drive.throttle - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+        if sent < length:
+            self.close_connection = True
+
+def build_workbook(rows, rows_per_sheet=500):
+    """Return the bytes of a synthetic catalog workbook with the given number of video rows."""
+    import io
+    import pandas as pd
+
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        for sheet, start in enumerate(range(0, rows, rows_per_sheet)):
+            count = min(rows_per_sheet, rows - start)
+            pd.DataFrame({
+                'Video Title': [f"Video {start + i}" for i in range(count)],
+                'Google Drive URL': [f"https://drive.google.com/file/d/bench{start + i}/view" for i in range(count)],
+                'Subject': f"Subject {sheet}",
+                'Topic': [f"Topic {(start + i) // 50}" for i in range(count)],
+                'Sub Topic': [f"Subtopic {(start + i) // 10}" for i in range(count)]
+            }).to_excel(writer, sheet_name=f"Sheet {sheet}", index=False)
+    return buffer.getvalue()
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where the resource module is missing."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _point_at(base_url):
+    main.DRIVE_DOWNLOAD_URL = base_url + "/uc?id={file_id}"
+    main.SPREADSHEET_EXPORT_URL = base_url + "/spreadsheets/d/{file_id}/export?format=xlsx"
+    logging.disable(logging.WARNING)
+
+def _workbook_case(base_url, options, results):
+    """Child process: run download_videos against the mock spreadsheet."""
+    _point_at(base_url)
+    root_folder = tempfile.mkdtemp(prefix='kyvi-bench-')
+    try:
+        downloader = main.VideoDownloader(
+            root_folder,
+            max_workers=options['workers'],
+            per_host_limit=options['workers'],
+            rate_limit=0,
+            segments=options['segments'],
+            segment_threshold=options['segment_threshold'],
+            engine=options['engine']
+        )
+        started = time.perf_counter()
+        summary = downloader.download_videos(SPREADSHEET_URL)
+        seconds = time.perf_counter() - started
+        metrics = downloader.metrics.summary()
+        downloader.manifest.close()
+        results.put({
+            'seconds': seconds,
+            'summary': summary,
+            'bytes': metrics['bytes'],
+            'retries': metrics['retries'],
+            'phases': metrics['phases'],
+            'peak_rss_mb': peak_rss_mb()
+        })
+    except Exception as e:
+        results.put({'error': str(e)})
+    finally:
+        shutil.rmtree(root_folder, ignore_errors=True)
+
+def _drive_case(base_url, options, results):
+    """Child process: fetch large files one after the other through download_from_drive."""
+    _point_at(base_url)
+    root_folder = tempfile.mkdtemp(prefix='kyvi-bench-')
+    try:
+        main.configure_http_session(pool_size=max(main.HTTP_POOL_SIZE, options['segments']))
+        succeeded = 0
+        received = 0
+        retries = 0
+        started = time.perf_counter()
+        for index in range(options['files']):
+            stats = {}
+            output_path = os.path.join(root_folder, f"large{index}.mp4")
+            if main.download_from_drive(f"https://drive.google.com/file/d/large{index}/view", output_path,
+                                        segments=options['segments'], segment_threshold=0, stats=stats):
+                succeeded += 1
+            received += stats.get('bytes', 0)
+            retries += stats.get('retries', 0)
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        results.put({
+            'seconds': time.perf_counter() - started,
+            'succeeded': succeeded,
+            'bytes': received,
+            'retries': retries,
+            'peak_rss_mb': peak_rss_mb()
+        })
+    except Exception as e:
+        results.put({'error': str(e)})
+    finally:
+        shutil.rmtree(root_folder, ignore_errors=True)
+
+def run_case(target, base_url, options):
+    """Run target in a fresh process and return its result dict."""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=target, args=(base_url, options, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+def benchmark_workbooks(drive, base_url, args):
+    reports = []
+    for rows in args.rows:
+        drive.workbook = build_workbook(rows)
+        drive.reset_stats()
+        result = run_case(_workbook_case, base_url, {
+            'workers': args.workers, 'segments': args.segments, 'segment_threshold': args.segment_threshold,
+            'engine': args.engine
+        })
+        report = {'case': f"workbook {rows} rows ({args.engine})", **drive.stats, **result}
+        if 'error' not in result:
+            report['rows_per_s'] = rows / result['seconds']
+            report['mb_per_s'] = result['bytes'] / 1048576 / result['seconds']
+        reports.append(report)
+    return reports
+
+def benchmark_drive(drive, base_url, args):
+    """Large files single stream, segmented, and resumed after dropped connections with and without Range."""
+    reports = []
+    drive.file_size = args.large_size
+    cases = [
+        ('drive single stream', {'segments': 1}, {}),
+        (f"drive {args.segments} segments", {'segments': args.segments}, {}),
+        ('resume with Range', {'segments': 1}, {'fail_rate': 1.0}),
+        ('resume without Range', {'segments': 1}, {'fail_rate': 1.0, 'ranges': False})
+    ]
+    for name, options, server_options in cases:
+        saved = {key: getattr(drive, key) for key in server_options}
+        for key, value in server_options.items():
+            setattr(drive, key, value)
+        drive.reset_stats()
+        result = run_case(_drive_case, base_url, {'files': args.large_files, **options})
+        for key, value in saved.items():
+            setattr(drive, key, value)
+
+        expected = args.large_files * args.large_size
+        report = {'case': name, **drive.stats, **result}
+        if 'error' not in result:
+            report['mb_per_s'] = result['bytes'] / 1048576 / result['seconds']
+            report['served_ratio'] = drive.stats['bytes_served'] / expected
+        reports.append(report)
+    drive.file_size = args.file_size
+    return reports
+
+def print_report(report):
+    if 'error' in report:
+        print(f"{report['case']:<28} ERROR: {report['error']}")
+        return
+    columns = [f"{report['case']:<28}", f"{report['seconds']:8.2f} s"]
+    if 'rows_per_s' in report:
+        columns.append(f"{report['rows_per_s']:9.1f} rows/s")
+    columns.append(f"{report['mb_per_s']:8.2f} MB/s")
+    if report.get('peak_rss_mb') is not None:
+        columns.append(f"peak RSS {report['peak_rss_mb']:7.1f} MB")
+    columns.append(f"{report['requests']} requests, {report['failures']} dropped, {report['retries']} retries")
+    if 'served_ratio' in report:
+        columns.append(f"served {report['served_ratio']:.2f}x file size, {report['succeeded']} complete")
+    if 'summary' in report:
+        summary = report['summary']
+        columns.append(f"{summary['downloaded']} downloaded, {summary['failed'] + summary['errors']} failed")
+    print("  ".join(columns))
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the downloader against a local mock Google Drive server.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 10000],
+                        help="Workbook sizes to benchmark (default: 100 1000 10000)")
+    parser.add_argument('--file-size', type=main.parse_rate, default=64 * 1024, metavar='SIZE',
+                        help="Size of every video in the workbook runs (default: 64K)")
+    parser.add_argument('--large-size', type=main.parse_rate, default=64 * 1024 * 1024, metavar='SIZE',
+                        help="Size of the files in the Drive download and resume runs (default: 64M)")
+    parser.add_argument('--large-files', type=int, default=2, help="Files per Drive download and resume run (default: 2)")
+    parser.add_argument('--latency', type=float, default=0.0, metavar='MS', help="Delay added to every response")
+    parser.add_argument('--throttle', type=main.parse_rate, metavar='RATE', help="Per-connection rate cap, e.g. 10M")
+    parser.add_argument('--no-range', action='store_true', help="Serve without Range support")
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help="Chance that a file's first transfer is cut off half way in the workbook runs")
+    parser.add_argument('-j', '--workers', type=int, default=4, help="Concurrent downloads (default: 4)")
+    parser.add_argument('--engine', choices=main.ENGINES, default='threads', help="Download engine of the workbook runs")
+    parser.add_argument('--segments', type=int, default=main.DEFAULT_SEGMENTS, help="Segments for large files")
+    parser.add_argument('--segment-threshold', type=main.parse_rate, default=main.DEFAULT_SEGMENT_THRESHOLD,
+                        metavar='SIZE', help="Minimum size for a segmented download in the workbook runs")
+    parser.add_argument('--skip-drive', action='store_true', help="Only run the workbook benchmarks")
+    parser.add_argument('--json', action='store_true', help="Print one JSON object per case instead of a table")
+    return parser
+
+def main_benchmark(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    drive = MockDriveServer(file_size=args.file_size, latency=args.latency / 1000, throttle=args.throttle,
+                            ranges=not args.no_range, fail_rate=args.fail_rate)
+    base_url = drive.start()
+    try:
+        reports = benchmark_workbooks(drive, base_url, args)
+        if not args.skip_drive:
+            # The large file runs inject their own failures
+            drive.fail_rate = 0.0
+            reports += benchmark_drive(drive, base_url, args)
+        for report in reports:
+            if args.json:
+                print(json.dumps(report, default=str))
+            else:
+                print_report(report)
+    finally:
+        drive.stop()
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -1,21 +1,29 @@
+import time
+
+# Measured from the first import so the startup cost of the (frozen) app can be logged
+_START_TIME = time.perf_counter()
+
 import os
-import pandas as pd
-import requests
-import gdown
-from pathlib import Path
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill
-from openpyxl.utils import get_column_letter
 import sys
 import logging
-from tqdm import tqdm
 import re
-import yt_dlp
-from urllib.parse import urlparse, parse_qs, unquote
-import time
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-from threading import Thread
+from urllib.parse import urlparse, parse_qs
+import json
+import sqlite3
+import hashlib
+import shutil
+import argparse
+import fnmatch
+from threading import Thread, Lock, Event
+import queue
+from datetime import datetime
+from contextlib import contextmanager
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+# pandas, requests and yt_dlp are slow to import, so they are imported where
+# they are used rather than here; the window appears before they are loaded.
 
 # Set up logging
 logging.basicConfig(
@@ -27,21 +35,118 @@ logging.basicConfig(
     ]
 )
 
+# Shared HTTP client settings
+HTTP_TIMEOUT = (10, 60)  # (connect, read) seconds
+HTTP_POOL_SIZE = 32
+HTTP_RETRIES = 5
+HTTP_BACKOFF_FACTOR = 1.0
+# Network failures in a row after which the other jobs on that host are failed without a request
+HOST_FAILURE_LIMIT = 3
+
+# Google endpoints, module-level so the downloader can be pointed at a mock server (see benchmark.py)
+DRIVE_DOWNLOAD_URL = "https://drive.google.com/uc?id={file_id}"
+SPREADSHEET_EXPORT_URL = "https://docs.google.com/spreadsheets/d/{file_id}/export?format=xlsx"
+
+_http_session = None
+_http_session_lock = Lock()
+
+def configure_http_session(pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES, backoff_factor=HTTP_BACKOFF_FACTOR, timeout=HTTP_TIMEOUT):
+    """Create the shared HTTP session used for every spreadsheet and video request.
+    
+    Connections are kept alive and pooled per host, and idempotent requests are
+    retried with exponential backoff on connection errors, 429 and 5xx responses.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    global _http_session
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    
+    # Apply the default timeout to every request made through the session
+    send_request = session.request
+    def request_with_timeout(method, url, **kwargs):
+        kwargs.setdefault('timeout', timeout)
+        return send_request(method, url, **kwargs)
+    session.request = request_with_timeout
+    with _http_session_lock:
+        old_session, _http_session = _http_session, session
+    if old_session is not None:
+        old_session.close()
+    return session
+
+def get_http_session():
+    """Return the shared HTTP session, creating it with the default settings on first use."""
+    with _http_session_lock:
+        session = _http_session
+    return session if session is not None else configure_http_session()
+
 def is_youtube_url(url):
     """Check if the URL is a YouTube link."""
     return 'youtube.com' in url or 'youtu.be' in url
 
-def download_from_youtube(url, output_path):
-    """Download a video from YouTube using yt-dlp."""
+def is_youtube_playlist(url):
+    """Check if the URL is a YouTube playlist page rather than a single video."""
+    return is_youtube_url(url) and '/playlist' in urlparse(url).path
+
+# Options shared by every yt-dlp instance; watch URLs that carry a list= parameter
+# download only the video itself, playlists are expanded into one job per video
+YOUTUBE_OPTIONS = {
+    'format': 'best[ext=mp4]',
+    'quiet': True,
+    'no_warnings': True,
+    'noplaylist': True
+}
+
+def new_youtube_downloader(concurrent_fragments=4):
+    """Create a yt-dlp instance that can be reused for a batch of downloads.
+    
+    Reusing one instance shares its extractors and their metadata cache between
+    videos. Instances are not thread-safe, so each batch uses its own.
+    """
+    import yt_dlp
+    
+    return yt_dlp.YoutubeDL(dict(YOUTUBE_OPTIONS, concurrent_fragment_downloads=concurrent_fragments))
+
+def expand_youtube_playlist(url, ydl=None):
+    """Return (video_url, title) for every entry of a YouTube playlist without downloading anything."""
+    owns_ydl = ydl is None
+    if owns_ydl:
+        ydl = new_youtube_downloader()
     try:
-        ydl_opts = {
-            'format': 'best[ext=mp4]',
-            'outtmpl': output_path,
-            'quiet': True,
-            'no_warnings': True
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+        info = ydl.extract_info(url, download=False, process=False)
+        entries = []
+        for entry in info.get('entries') or []:
+            video_url = entry.get('url') or ''
+            if not video_url.startswith('http'):
+                video_url = f"https://www.youtube.com/watch?v={entry.get('id')}"
+            entries.append((video_url, entry.get('title') or entry.get('id')))
+        return entries
+    finally:
+        if owns_ydl:
+            ydl.close()
+
+def download_from_youtube(url, output_path, ydl=None):
+    """Download a video from YouTube using yt-dlp, reusing ydl when given."""
+    try:
+        if ydl is None:
+            with new_youtube_downloader() as own_ydl:
+                return download_from_youtube(url, output_path, own_ydl)
+        
+        # Point the shared instance at this video's output file
+        ydl.params['outtmpl']['default'] = output_path.replace('%', '%%')
+        ydl.download([url])
         
         if os.path.exists(output_path) and os.path.getsize(output_path) > 1024:
             logging.info(f"Successfully downloaded from YouTube: {output_path}")
@@ -80,71 +185,717 @@ def extract_file_id(url):
         logging.error(f"Error extracting file ID from {url}: {str(e)}")
         return None
 
-def download_from_drive(url, output_path):
-    """Download a file from Google Drive."""
+class IncompleteDownloadError(Exception):
+    """Raised when a transfer ends before the expected number of bytes arrived."""
+
+class DownloadCancelled(Exception):
+    """Raised inside a download when the user cancels the run."""
+
+class _RemoteFileChanged(IncompleteDownloadError):
+    """Raised when the server reports another size than the one a segmented download was planned for."""
+
+class NetworkUnavailable(Exception):
+    """Raised for a job whose download failed only because the server could not be reached."""
+
+# Streaming defaults: network read size, file write buffer and progress report spacing
+DEFAULT_CHUNK_SIZE = 256 * 1024
+DEFAULT_WRITE_BUFFER = 4 * 1024 * 1024
+PROGRESS_INTERVAL = 0.5
+PROGRESS_BYTES = 16 * 1024 * 1024
+# Files at least this large are fetched over several parallel Range requests
+DEFAULT_SEGMENTS = 4
+DEFAULT_SEGMENT_THRESHOLD = 256 * 1024 * 1024
+# A segment flushes and checkpoints its progress every this many bytes
+SEGMENT_CHECKPOINT_BYTES = 32 * 1024 * 1024
+
+def parse_rate(value):
+    """Parse a rate such as '500K', '20M' or '1.5G' (bytes per second) into bytes per second."""
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMG]?)(?:B|B/S|/S)?\s*', str(value).upper())
+    if not match:
+        raise ValueError(f"Invalid rate: {value}")
+    multiplier = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}[match.group(2)]
+    return int(float(match.group(1)) * multiplier)
+
+def office_hours_schedule(start_hour, end_hour, office_limit, default_limit=None):
+    """Return a callable giving office_limit on weekdays between start_hour and end_hour, default_limit otherwise."""
+    def current_limit():
+        now = datetime.now()
+        if now.weekday() < 5 and start_hour <= now.hour < end_hour:
+            return office_limit
+        return default_limit
+    return current_limit
+
+class TokenBucket:
+    """Thread-safe token bucket capping the combined transfer rate of all downloads.
+    
+    rate is in bytes per second (None or 0 means unlimited). A schedule callable
+    returning the rate for the current time is re-evaluated every
+    schedule_interval seconds, so the cap follows e.g. office hours.
+    """
+
+    def __init__(self, rate=None, schedule=None, schedule_interval=30):
+        self.lock = Lock()
+        self.schedule = schedule
+        self.schedule_interval = schedule_interval
+        self.next_schedule_check = 0.0
+        self.rate = None
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self._set_rate(rate)
+
+    def _set_rate(self, rate):
+        rate = rate or None
+        if rate != self.rate:
+            logging.info(f"Bandwidth limit: {f'{rate / 1048576:.2f} MB/s' if rate else 'unlimited'}")
+        self.rate = rate
+        self.tokens = min(self.tokens, rate or 0)
+
+    def set_rate(self, rate):
+        with self.lock:
+            self._set_rate(rate)
+
+    def reserve(self, amount):
+        """Account for amount bytes and return the seconds to wait to stay under the rate."""
+        with self.lock:
+            now = time.monotonic()
+            if self.schedule and now >= self.next_schedule_check:
+                self.next_schedule_check = now + self.schedule_interval
+                self._set_rate(self.schedule())
+            if not self.rate:
+                return 0
+            # Refill up to one second of burst, then go into debt for this chunk
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    def consume(self, amount):
+        """Account for amount bytes, sleeping as long as needed to stay under the rate."""
+        delay = self.reserve(amount)
+        if delay:
+            time.sleep(delay)
+
+class ProgressThrottle:
+    """Coalesce per-chunk progress into calls at most every interval seconds or byte_interval bytes."""
+
+    def __init__(self, callback, interval=PROGRESS_INTERVAL, byte_interval=PROGRESS_BYTES):
+        self.callback = callback
+        self.interval = interval
+        self.byte_interval = byte_interval
+        self.pending = 0
+        self.last_report = 0.0
+        self.lock = Lock()
+
+    def __call__(self, chunk_bytes, downloaded, total_size):
+        with self.lock:
+            self.pending += chunk_bytes
+            now = time.monotonic()
+            if (downloaded < total_size and now - self.last_report < self.interval
+                    and self.pending < self.byte_interval):
+                return
+            pending, self.pending, self.last_report = self.pending, 0, now
+        self.callback(pending, downloaded, total_size)
+
+class DownloadControl:
+    """Pause/resume/cancel switch and optional bandwidth cap shared by every download of a run.
+    
+    Downloads call checkpoint() for every chunk: it blocks while the run is
+    paused, raises DownloadCancelled once it has been cancelled and waits as
+    needed to keep all downloads together under the bandwidth cap.
+    """
+
+    def __init__(self, bandwidth=None):
+        self.running = Event()
+        self.running.set()
+        self.cancelled = Event()
+        self.bandwidth = bandwidth
+
+    def pause(self):
+        self.running.clear()
+
+    def resume(self):
+        self.running.set()
+
+    def cancel(self):
+        self.cancelled.set()
+        self.running.set()
+
+    @property
+    def paused(self):
+        return not self.running.is_set()
+
+    def checkpoint(self, chunk_bytes=0):
+        self.running.wait()
+        if self.cancelled.is_set():
+            raise DownloadCancelled("Download cancelled")
+        if self.bandwidth and chunk_bytes:
+            self.bandwidth.consume(chunk_bytes)
+
+    async def async_checkpoint(self, chunk_bytes=0):
+        """checkpoint() for the asyncio engine, waiting without blocking the event loop."""
+        import asyncio
+        
+        while not self.running.is_set():
+            await asyncio.sleep(0.1)
+        if self.cancelled.is_set():
+            raise DownloadCancelled("Download cancelled")
+        if self.bandwidth and chunk_bytes:
+            delay = self.bandwidth.reserve(chunk_bytes)
+            if delay:
+                await asyncio.sleep(delay)
+
+def parse_content_range(value):
+    """Return (start, total) from a 'bytes start-end/total' or 'bytes */total' Content-Range header."""
+    match = re.match(r'bytes (?:(\d+)-\d+|\*)/(\d+|\*)', value or '')
+    if not match:
+        return None, None
+    start, total = match.groups()
+    return (int(start) if start is not None else None), (int(total) if total != '*' else None)
+
+def looks_like_html(head):
+    """Return True if the first bytes of a download are an HTML page rather than a video."""
+    text = head.lstrip()[:64].lower()
+    return text.startswith((b'<!doctype html', b'<html', b'<head', b'<?xml'))
+
+def _open_part_response(status, headers, part_path, offset, download_url, stats=None, split_threshold=None):
+    """Check the response to a part file request before its body is read.
+    
+    Returns (offset, total_size, mode) for writing the body, with mode None if
+    the part file is already complete and 'segments' if a fresh download is at
+    least split_threshold bytes, or None if the response is unusable.
+    Raises IncompleteDownloadError when the part file has to be fetched again.
+    """
+    if status in (200, 206) and 'text/html' in headers.get('content-type', '').lower():
+        logging.error(f"Received an HTML page instead of a video from {download_url} "
+                      f"(Drive quota exceeded or virus-scan warning?)")
+        return None
+    
+    if status == 416:
+        # Nothing left to fetch: either the part file is already complete or it no longer matches
+        total_size = parse_content_range(headers.get('content-range'))[1]
+        if total_size == offset:
+            logging.info(f"{os.path.basename(part_path)} is already complete")
+            if stats is not None:
+                stats.update(size=offset, sha256=file_sha256(part_path))
+            return offset, total_size, None
+        os.remove(part_path)
+        raise IncompleteDownloadError(f"Stale partial file discarded: {part_path}")
+    
+    if status == 206:
+        start, total_size = parse_content_range(headers.get('content-range'))
+        if start != offset:
+            os.remove(part_path)
+            raise IncompleteDownloadError(f"Server resumed at byte {start} instead of {offset}")
+        if total_size is None:
+            total_size = offset + int(headers.get('content-length', 0))
+        mode = 'segments' if split_threshold is not None and offset == 0 and total_size >= split_threshold else 'ab'
+    elif status == 200:
+        # Range not honoured (or fresh download), the body is the whole file
+        offset = 0
+        total_size = int(headers.get('content-length', 0))
+        mode = 'wb'
+    else:
+        logging.error(f"Failed to download {download_url}. Status code: {status}")
+        return None
+    
+    if total_size == 0:
+        logging.error(f"Failed to get file size for {download_url}")
+        return None
+    
+    if offset:
+        logging.info(f"Resuming {os.path.basename(part_path)} at {offset}/{total_size} bytes")
+    return offset, total_size, mode
+
+class _PartProgress:
+    """Count the bytes written to a part file, report them and log every 10% step."""
+    
+    def __init__(self, part_path, offset, total_size, progress_callback=None):
+        self.name = os.path.basename(part_path)
+        self.downloaded = offset
+        self.total_size = total_size
+        self.progress_callback = progress_callback
+        self.logged_step = offset * 10 // total_size
+    
+    def advance(self, chunk_bytes):
+        self.downloaded += chunk_bytes
+        if self.progress_callback:
+            self.progress_callback(chunk_bytes, self.downloaded, self.total_size)
+        step = self.downloaded * 10 // self.total_size
+        if step > self.logged_step:
+            self.logged_step = step
+            logging.info(f"Download progress for {self.name}: {step * 10}%")
+
+def _check_part_complete(part_path, total_size, digest, stats=None):
+    """Return True if part_path holds all total_size bytes, raising IncompleteDownloadError otherwise."""
+    # Only a file whose size matches the announced length counts as complete
+    size = os.path.getsize(part_path)
+    if size > total_size:
+        os.remove(part_path)
+        raise IncompleteDownloadError(f"Partial file is larger than the remote file: {part_path}")
+    if size < total_size:
+        raise IncompleteDownloadError(f"Received {size} of {total_size} bytes for {part_path}")
+    if stats is not None:
+        stats.update(size=size, sha256=digest.hexdigest())
+    return True
+
+def _fetch_to_part(session, download_url, part_path, progress_callback=None, control=None, stats=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE, write_buffer=DEFAULT_WRITE_BUFFER, split_threshold=None,
+                   segments=DEFAULT_SEGMENTS):
+    """Fetch download_url into part_path, resuming with a Range request if it already exists.
+    
+    Returns True once part_path holds the complete file, False on a non-retryable
+    failure, and raises IncompleteDownloadError when the transfer is cut short.
+    progress_callback(chunk_bytes, downloaded, total_size) is called for every chunk.
+    
+    The SHA-256 of the file is computed while it is written and stored in
+    stats, and an HTML page served instead of the video (Drive quota or
+    virus-scan interstitial) is rejected.
+    
+    With split_threshold, a fresh download asks for `bytes=0-`; if the server
+    honours the range and the file is at least split_threshold bytes, it is
+    fetched in `segments` parallel ranges, the open response serving the first.
+    """
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {'Range': f'bytes={offset}-'} if offset or split_threshold is not None else {}
+    
+    with session.get(download_url, stream=True, headers=headers) as response:
+        opened = _open_part_response(response.status_code, response.headers, part_path, offset, download_url,
+                                     stats, split_threshold)
+        if opened is None:
+            return False
+        offset, total_size, mode = opened
+        if mode is None:
+            return True
+        if mode == 'segments':
+            state = _start_segments(part_path, part_path + '.segments', total_size, segments)
+            logging.info(f"Downloading {os.path.basename(part_path)} in {len(state['segments'])} segments")
+            return _fetch_segmented(session, download_url, part_path, state, progress_callback, control, stats,
+                                    chunk_size, write_buffer, first_response=response)
+        
+        # Hash while writing; a resumed file's existing bytes are hashed first
+        digest = hashlib.sha256()
+        if offset:
+            file_sha256(part_path, digest=digest)
+        
+        # Download the file through a large write buffer
+        progress = _PartProgress(part_path, offset, total_size, progress_callback)
+        with open(part_path, mode, buffering=write_buffer) as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if control:
+                    control.checkpoint(len(chunk))
+                if chunk:
+                    if progress.downloaded == 0 and looks_like_html(chunk):
+                        f.close()
+                        os.remove(part_path)
+                        logging.error(f"Received an HTML page instead of a video from {download_url}")
+                        return False
+                    f.write(chunk)
+                    digest.update(chunk)
+                    progress.advance(len(chunk))
+    
+    return _check_part_complete(part_path, total_size, digest, stats)
+
+def _load_segment_state(part_path, state_path):
+    """Return the saved segment state of part_path, or None.
+    
+    State whose preallocated part file is missing or has another size is
+    stale; it is removed so the download starts over.
+    """
+    if not os.path.exists(state_path):
+        return None
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = None
+    if not isinstance(state, dict) or not os.path.exists(part_path) or os.path.getsize(part_path) != state.get('total'):
+        logging.warning(f"Discarding stale segment state {state_path}")
+        os.remove(state_path)
+        return None
+    return state
+
+def _save_segment_state(state_path, state):
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def _start_segments(part_path, state_path, total_size, segments):
+    """Split total_size bytes into segments byte ranges and preallocate the part file."""
+    segment_size = -(-total_size // segments)
+    state = {
+        'total': total_size,
+        'segments': [[start, min(start + segment_size, total_size) - 1, 0]
+                     for start in range(0, total_size, segment_size)]
+    }
+    # Preallocate the part file so segments can be written in place
+    with open(part_path, 'wb') as f:
+        f.truncate(total_size)
+    _save_segment_state(state_path, state)
+    return state
+
+def _fetch_segment(session, download_url, part_path, segment, total_size, on_chunk=None, control=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE, write_buffer=DEFAULT_WRITE_BUFFER, on_flush=None, response=None):
+    """Fetch the missing tail of one [start, end, done] segment into the preallocated part file.
+    
+    on_flush() is called every SEGMENT_CHECKPOINT_BYTES, once the bytes counted in done are flushed.
+    An already open response starting at the missing tail can be passed in;
+    it is read up to the end of the segment only.
+    """
+    start, end, done = segment
+    if start + done > end:
+        return
+    if response is None:
+        response = session.get(download_url, stream=True, headers={'Range': f'bytes={start + done}-{end}'})
+    with response:
+        range_start, remote_size = parse_content_range(response.headers.get('content-range'))
+        if response.status_code != 206 or range_start != start + done:
+            raise IncompleteDownloadError(f"Server did not honour range bytes={start + done}-{end}")
+        if remote_size is not None and remote_size != total_size:
+            raise _RemoteFileChanged(f"Remote file is {remote_size} bytes, the segments were planned for {total_size}")
+        with open(part_path, 'r+b', buffering=write_buffer) as f:
+            f.seek(start + done)
+            unflushed = 0
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if control:
+                    control.checkpoint(len(chunk))
+                if chunk:
+                    chunk = chunk[:end + 1 - start - segment[2]]
+                    f.write(chunk)
+                    segment[2] += len(chunk)
+                    if on_chunk:
+                        on_chunk(len(chunk))
+                    unflushed += len(chunk)
+                    if on_flush and unflushed >= SEGMENT_CHECKPOINT_BYTES:
+                        f.flush()
+                        on_flush()
+                        unflushed = 0
+                    if start + segment[2] > end:
+                        break
+    if start + segment[2] <= end:
+        raise IncompleteDownloadError(f"Segment {start}-{end} ended at byte {start + segment[2]}")
+
+def _fetch_segmented(session, download_url, part_path, state, progress_callback=None, control=None, stats=None,
+                     chunk_size=DEFAULT_CHUNK_SIZE, write_buffer=DEFAULT_WRITE_BUFFER, first_response=None):
+    """Fetch all unfinished segments of state in parallel into part_path.
+    
+    first_response, an open `bytes=0-` response, serves the first segment
+    instead of a request of its own.
+    
+    Per-segment progress is checkpointed next to the part file while the
+    segments run, so that an interrupted segmented download (even a killed
+    process) resumes only the missing byte ranges. Segments arrive out of
+    order, so the file is hashed once it is complete.
+    """
+    import requests
+    
+    state_path = part_path + '.segments'
+    segments = state['segments']
+    errors = []
+    # The checkpoint only records bytes each segment has flushed to disk
+    saved = {'total': state['total'], 'segments': [list(segment) for segment in segments]}
+    saved_lock = Lock()
+    
+    def on_flush(index):
+        with saved_lock:
+            saved['segments'][index][2] = segments[index][2]
+            _save_segment_state(state_path, saved)
+    
+    def on_chunk(chunk_bytes):
+        if progress_callback:
+            progress_callback(chunk_bytes, sum(segment[2] for segment in segments), state['total'])
+    
+    try:
+        with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+            futures = [executor.submit(_fetch_segment, session, download_url, part_path, segment, state['total'],
+                                       on_chunk, control, chunk_size, write_buffer, lambda index=index: on_flush(index),
+                                       first_response if index == 0 else None)
+                       for index, segment in enumerate(segments)]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except (IncompleteDownloadError, requests.RequestException) as e:
+                    errors.append(e)
+    finally:
+        _save_segment_state(state_path, state)
+    
+    if any(isinstance(e, _RemoteFileChanged) for e in errors):
+        # The file was replaced on the server, the segments fetched so far are useless
+        os.remove(state_path)
+        os.remove(part_path)
+    if errors:
+        raise IncompleteDownloadError(f"{len(errors)} of {len(segments)} segments incomplete: {str(errors[0])}")
+    
+    os.remove(state_path)
+    
+    with open(part_path, 'rb') as f:
+        head = f.read(64)
+    if looks_like_html(head):
+        os.remove(part_path)
+        logging.error(f"Received an HTML page instead of a video from {download_url}")
+        return False
+    if stats is not None:
+        stats.update(size=os.path.getsize(part_path), sha256=file_sha256(part_path))
+    return True
+
+def _transfer_recorder(stats, progress_callback=None):
+    """Wrap a progress callback to count received bytes and the time to first byte into stats."""
+    started = time.monotonic()
+    lock = Lock()
+    stats.setdefault('bytes', 0)
+    
+    def record(chunk_bytes, downloaded, total_size):
+        with lock:
+            if 'ttfb' not in stats:
+                stats['ttfb'] = time.monotonic() - started
+            stats['bytes'] += chunk_bytes
+        if progress_callback:
+            progress_callback(chunk_bytes, downloaded, total_size)
+    return record
+
+def download_from_drive(url, output_path, max_attempts=3, segments=DEFAULT_SEGMENTS, segment_threshold=DEFAULT_SEGMENT_THRESHOLD,
+                        progress_callback=None, control=None, stats=None,
+                        chunk_size=DEFAULT_CHUNK_SIZE, write_buffer=DEFAULT_WRITE_BUFFER):
+    """Download a file from Google Drive.
+    
+    Data is written to `<output_path>.part` and only renamed to output_path once
+    its size matches the Content-Length, so an interrupted download is resumed
+    with a Range request (on the next attempt or the next run) instead of
+    starting again from byte zero. Data is read in chunk_size pieces and
+    written through a write_buffer sized file buffer.
+    
+    Files of at least `segment_threshold` bytes are split into `segments` byte
+    ranges fetched in parallel, when the server supports Range requests.
+    
+    progress_callback(chunk_bytes, downloaded, total_size) reports progress
+    (throttled to PROGRESS_INTERVAL seconds or PROGRESS_BYTES bytes), and
+    a DownloadControl can pause the transfer or cancel it (raising DownloadCancelled,
+    with the partial file kept for a later resume). If given, the stats dict
+    receives the size and SHA-256 of the downloaded file, the bytes received,
+    the number of retries and the time to first byte, or 'network_error' when
+    the last attempt failed because the server could not be reached.
+    """
+    import requests
+    
     try:
         file_id = extract_file_id(url)
         if not file_id:
             return False
             
         # Construct the download URL
-        download_url = f"https://drive.google.com/uc?id={file_id}"
+        download_url = DRIVE_DOWNLOAD_URL.format(file_id=file_id)
+        part_path = output_path + '.part'
+        state_path = part_path + '.segments'
         
-        # Make the request with a session to handle cookies
-        session = requests.Session()
-        response = session.get(download_url, stream=True)
+        # Use the shared session to reuse pooled connections and cookies
+        session = get_http_session()
+        if progress_callback:
+            progress_callback = ProgressThrottle(progress_callback)
+        if stats is not None:
+            progress_callback = _transfer_recorder(stats, progress_callback)
         
-        # Check if the response is valid
-        if response.status_code != 200:
-            logging.error(f"Failed to download {url}. Status code: {response.status_code}")
-            return False
-            
-        # Get the file size
-        total_size = int(response.headers.get('content-length', 0))
-        if total_size == 0:
-            logging.error(f"Failed to get file size for {url}")
+        for attempt in range(1, max_attempts + 1):
+            if stats is not None:
+                stats['retries'] = attempt - 1
+            try:
+                # A segmented download in progress is resumed; otherwise the first response decides
+                segment_state = _load_segment_state(part_path, state_path)
+                if segment_state is not None:
+                    complete = _fetch_segmented(session, download_url, part_path, segment_state,
+                                                progress_callback, control, stats, chunk_size, write_buffer)
+                else:
+                    split_threshold = segment_threshold if segments > 1 and not os.path.exists(part_path) else None
+                    complete = _fetch_to_part(session, download_url, part_path, progress_callback, control, stats,
+                                              chunk_size, write_buffer, split_threshold, segments)
+                if not complete:
+                    return False
+                break
+            except (IncompleteDownloadError, requests.RequestException) as e:
+                logging.warning(f"Download of {url} interrupted (attempt {attempt}/{max_attempts}): {str(e)}")
+                if attempt == max_attempts:
+                    if os.path.exists(part_path):
+                        logging.error(f"Giving up on {url}, partial data kept in {part_path}")
+                    else:
+                        logging.error(f"Giving up on {url}")
+                    if stats is not None and isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                        stats['network_error'] = str(e)
+                    return False
+                time.sleep(attempt)
+        
+        os.replace(part_path, output_path)
+        logging.info(f"Successfully downloaded: {output_path}")
+        return True
+        
+    except DownloadCancelled:
+        raise
+    except Exception as e:
+        logging.error(f"Error downloading {url}: {str(e)}")
+        return False
+
+def download_video(url, output_path, ydl=None, **drive_options):
+    """Download video from either YouTube or Google Drive.
+    
+    ydl is an optional shared yt-dlp instance for YouTube URLs; drive_options
+    are passed on to download_from_drive.
+    """
+    if is_youtube_url(url):
+        return download_from_youtube(url, output_path, ydl=ydl)
+    else:
+        return download_from_drive(url, output_path, **drive_options)
+
+# Responses worth another attempt on the asyncio engine (urllib3 Retry handles them for requests)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def new_async_http_session(limit=100, timeout=HTTP_TIMEOUT):
+    """Create the aiohttp session of the asyncio engine. Must be called inside a running event loop."""
+    import aiohttp
+    
+    connect_timeout, read_timeout = timeout
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=limit),
+        timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+    )
+
+def _write_block(f, digest, data):
+    f.write(data)
+    digest.update(data)
+
+async def _async_fetch_to_part(session, download_url, part_path, progress_callback=None, control=None, stats=None,
+                               chunk_size=DEFAULT_CHUNK_SIZE, write_buffer=DEFAULT_WRITE_BUFFER):
+    """Asyncio counterpart of _fetch_to_part.
+    
+    Chunks are collected into a write_buffer sized block, which is written
+    and hashed in a worker thread so the event loop keeps serving other streams.
+    """
+    import asyncio
+    
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+    
+    async with session.get(download_url, headers=headers) as response:
+        if response.status in RETRY_STATUSES:
+            raise IncompleteDownloadError(f"Server answered {response.status} for {download_url}")
+        
+        opened = _open_part_response(response.status, response.headers, part_path, offset, download_url, stats)
+        if opened is None:
             return False
-            
-        # Download the file
-        with open(output_path, 'wb') as f:
-            downloaded = 0
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    # Log progress every 10%
-                    if total_size > 0:
-                        progress = (downloaded / total_size) * 100
-                        if int(progress) % 10 == 0:
-                            logging.info(f"Download progress for {os.path.basename(output_path)}: {int(progress)}%")
-        
-        # Verify the download
-        if os.path.getsize(output_path) == 0:
-            logging.error(f"Downloaded file is empty: {output_path}")
-            os.remove(output_path)
+        offset, total_size, mode = opened
+        if mode is None:
+            return True
+        
+        # Hash while writing; a resumed file's existing bytes are hashed first
+        digest = hashlib.sha256()
+        if offset:
+            await asyncio.to_thread(file_sha256, part_path, digest=digest)
+        
+        progress = _PartProgress(part_path, offset, total_size, progress_callback)
+        f = await asyncio.to_thread(open, part_path, mode)
+        pending = bytearray()
+        html = False
+        try:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                if control:
+                    await control.async_checkpoint(len(chunk))
+                if progress.downloaded == 0 and looks_like_html(chunk):
+                    html = True
+                    break
+                pending += chunk
+                if len(pending) >= write_buffer:
+                    await asyncio.to_thread(_write_block, f, digest, bytes(pending))
+                    pending.clear()
+                progress.advance(len(chunk))
+        finally:
+            # Keep whatever was received so an interrupted download resumes from there
+            if pending and not html:
+                await asyncio.to_thread(_write_block, f, digest, bytes(pending))
+            await asyncio.to_thread(f.close)
+    
+    if html:
+        os.remove(part_path)
+        logging.error(f"Received an HTML page instead of a video from {download_url}")
+        return False
+    
+    return _check_part_complete(part_path, total_size, digest, stats)
+
+async def async_download_from_drive(url, output_path, max_attempts=3, segments=None, segment_threshold=None,
+                                    progress_callback=None, control=None, stats=None,
+                                    chunk_size=DEFAULT_CHUNK_SIZE, write_buffer=DEFAULT_WRITE_BUFFER, *, session=None):
+    """Asyncio counterpart of download_from_drive, for the asyncio engine.
+    
+    Takes the same options and resumes the same .part files, but every file is
+    streamed over a single connection (segments and segment_threshold are
+    accepted for compatibility and ignored). session is a shared aiohttp
+    session from new_async_http_session(); without one a session is opened
+    for this download. Cancelling the task, or the DownloadControl, stops the
+    transfer with the partial file kept.
+    """
+    import asyncio
+    import aiohttp
+    
+    if session is None:
+        async with new_async_http_session() as session:
+            return await async_download_from_drive(url, output_path, max_attempts,
+                                                   progress_callback=progress_callback, control=control,
+                                                   stats=stats, chunk_size=chunk_size, write_buffer=write_buffer,
+                                                   session=session)
+    
+    try:
+        file_id = extract_file_id(url)
+        if not file_id:
             return False
-            
+        
+        download_url = DRIVE_DOWNLOAD_URL.format(file_id=file_id)
+        part_path = output_path + '.part'
+        if progress_callback:
+            progress_callback = ProgressThrottle(progress_callback)
+        if stats is not None:
+            progress_callback = _transfer_recorder(stats, progress_callback)
+        
+        for attempt in range(1, max_attempts + 1):
+            if stats is not None:
+                stats['retries'] = attempt - 1
+            try:
+                complete = await _async_fetch_to_part(session, download_url, part_path, progress_callback, control,
+                                                      stats, chunk_size, write_buffer)
+                if not complete:
+                    return False
+                break
+            except (IncompleteDownloadError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warning(f"Download of {url} interrupted (attempt {attempt}/{max_attempts}): {str(e)}")
+                if attempt == max_attempts:
+                    if os.path.exists(part_path):
+                        logging.error(f"Giving up on {url}, partial data kept in {part_path}")
+                    else:
+                        logging.error(f"Giving up on {url}")
+                    if stats is not None and isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+                        stats['network_error'] = str(e) or type(e).__name__
+                    return False
+                await asyncio.sleep(attempt)
+        
+        os.replace(part_path, output_path)
         logging.info(f"Successfully downloaded: {output_path}")
         return True
         
+    except DownloadCancelled:
+        raise
     except Exception as e:
         logging.error(f"Error downloading {url}: {str(e)}")
-        if os.path.exists(output_path):
-            os.remove(output_path)
         return False
 
-def download_video(url, output_path):
-    """Download video from either YouTube or Google Drive."""
+async def async_download_video(url, output_path, ydl=None, *, session=None, **drive_options):
+    """Asyncio counterpart of download_video; YouTube downloads run in a worker thread."""
+    import asyncio
+    
     if is_youtube_url(url):
-        return download_from_youtube(url, output_path)
+        return await asyncio.to_thread(download_from_youtube, url, output_path, ydl)
     else:
-        return download_from_drive(url, output_path)
+        return await async_download_from_drive(url, output_path, session=session, **drive_options)
 
 def download_spreadsheet_xlsx(url, dest_path):
     """Download the spreadsheet as an Excel file from the given URL."""
     logging.info("Downloading spreadsheet as Excel (.xlsx)...")
     try:
-        response = requests.get(url)
+        response = get_http_session().get(url)
         response.raise_for_status()
         with open(dest_path, 'wb') as f:
             f.write(response.content)
@@ -164,82 +915,762 @@ def find_column(df, possible_keywords):
                 return col
     return None
 
-def process_videos_all_sheets(root_folder, spreadsheet_path):
-    """Process all sheets in the Excel file and download videos."""
+class RateLimiter:
+    """Space out download starts so that at most `rate` begin per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = Lock()
+        self.next_start = 0.0
+
+    def reserve(self):
+        """Book the next start slot and return the seconds to wait for it."""
+        if not self.interval:
+            return 0
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        return max(0, start - now)
+
+    def wait(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+class DownloadScheduler:
+    """Run download jobs on a bounded worker pool.
+
+    `max_workers` caps the number of downloads in flight overall,
+    `per_host_limit` caps them per host and `rate_limit` is the maximum
+    number of downloads started per second (0 disables it).
+    """
+
+    def __init__(self, max_workers=4, per_host_limit=2, rate_limit=2.0):
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.rate_limiter = RateLimiter(rate_limit)
+
+    def _run_job(self, func, job):
+        self.rate_limiter.wait()
+        return func(job)
+
+    def run(self, jobs, func, control=None):
+        """Call `func(job)` for every job and yield `(job, result, error)` as they finish.
+        
+        Jobs are handed to the pool per host, round-robin, and only while their
+        host is below `per_host_limit`, so a busy host never ties up a worker
+        that could be serving another host. If the run is interrupted (Ctrl-C,
+        or the caller stops iterating), `control` is cancelled so the running
+        jobs stop at their next checkpoint instead of holding up the pool shutdown.
+        """
+        if not jobs:
+            return
+        pending = {}
+        for job in jobs:
+            pending.setdefault(urlparse(job['url']).netloc.lower(), deque()).append(job)
+        active = {}
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while pending or futures:
+                    # Fill the free workers from the hosts that still have room
+                    while len(futures) < self.max_workers:
+                        host = next((host for host in pending if active.get(host, 0) < self.per_host_limit), None)
+                        if host is None:
+                            break
+                        job = pending[host].popleft()
+                        queue_left = pending.pop(host)
+                        if queue_left:
+                            # Back of the line, so the other hosts get their turn
+                            pending[host] = queue_left
+                        active[host] = active.get(host, 0) + 1
+                        futures[executor.submit(self._run_job, func, job)] = (job, host)
+                    
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job, host = futures.pop(future)
+                        active[host] -= 1
+                        try:
+                            yield job, future.result(), None
+                        except Exception as e:
+                            yield job, None, e
+            except BaseException:
+                # Stop the running jobs before the pool waits for them
+                if control:
+                    control.cancel()
+                raise
+
+def file_sha256(path, chunk_size=1024 * 1024, digest=None):
+    """Return the SHA-256 hex digest of a file.
+    
+    With digest, the file is fed into that running hash instead of a new one.
+    """
+    if digest is None:
+        digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def link_file(source_path, target_path):
+    """Make target_path a copy of source_path without duplicating its data where possible.
+    
+    Tries a hardlink first, then a copy-on-write reflink (Linux), and finally
+    falls back to a regular copy. Returns the method that was used.
+    """
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    tmp_path = target_path + '.link'
     try:
-        # Read all sheets
-        excel_file = pd.ExcelFile(spreadsheet_path)
-        sheet_names = excel_file.sheet_names
+        os.link(source_path, tmp_path)
+        method = 'hardlink'
+    except OSError:
+        try:
+            import fcntl
+            FICLONE = 0x40049409
+            with open(source_path, 'rb') as source, open(tmp_path, 'wb') as target:
+                fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            method = 'reflink'
+        except (ImportError, OSError):
+            shutil.copy2(source_path, tmp_path)
+            method = 'copy'
+    os.replace(tmp_path, target_path)
+    return method
+
+def catalog_row_hash(sheet_name, title, url, subject, topic, subtopic):
+    """Return a stable hash of the catalog fields that decide what is downloaded and where."""
+    import pandas as pd
+    
+    fields = [sheet_name, title, url, subject, topic, subtopic]
+    text = '\x1f'.join('' if pd.isna(field) else str(field) for field in fields)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def video_key(url):
+    """Return the manifest key of a video: its Drive file ID, or the URL for other sources."""
+    if not is_youtube_url(url):
+        file_id = extract_file_id(url)
+        if file_id:
+            return file_id
+    return url
+
+# Characters removed from video titles to form file names
+UNSAFE_FILENAME_CHARS = r'[^\w \-]'
+
+def safe_filename(title):
+    """Turn a video title into a file name (without extension)."""
+    return re.sub(UNSAFE_FILENAME_CHARS, '', str(title)).strip().replace(' ', '_')
+
+def resolve_path_collisions(jobs):
+    """Give every video its own output path, renaming jobs in place.
+    
+    Titles that only differ in removed characters ("Intro?" and "Intro!")
+    map to the same file; the first video keeps the name and the others get
+    their key (Drive file ID or URL) appended, so two downloads never share
+    a .part file. Rows of the same video keep sharing their path.
+    """
+    owners = {}
+    for job in jobs:
+        owner = owners.setdefault(os.path.normcase(job['output_path']), job['key'])
+        if owner != job['key']:
+            base, extension = os.path.splitext(job['output_path'])
+            output_path = f"{base}_{safe_filename(job['key'])}{extension}"
+            logging.warning(f"{job['title']} would overwrite {job['output_path']}, saving it as {output_path}")
+            job['output_path'] = output_path
+            owners.setdefault(os.path.normcase(output_path), job['key'])
+    return jobs
+
+JOB_COLUMNS = ['sheet', 'index', 'title', 'url', 'key', 'row_hash',
+               'subject', 'topic', 'subtopic', 'folder', 'output_path']
+
+def _optional_column(df, name, default=''):
+    """Return a column as strings with missing values replaced by default."""
+    import pandas as pd
+    
+    if name not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    column = df[name]
+    return column.where(column.notna(), default).astype(str)
+
+def build_job_table(df, sheet_name, root_folder):
+    """Turn the valid rows of a sheet into a job table with column operations.
+    
+    Returns one row per downloadable video (see JOB_COLUMNS), with the
+    Subject/Topic/Subtopic folder and a safe file name derived for every row at once.
+    """
+    import pandas as pd
+    
+    if 'Video Title' not in df.columns or 'Google Drive URL' not in df.columns:
+        logging.warning(f"Sheet {sheet_name} has no 'Video Title' or 'Google Drive URL' column, skipping")
+        return pd.DataFrame(columns=JOB_COLUMNS)
+    
+    # Keep rows with a title and an http(s) URL
+    titles = df['Video Title']
+    urls = df['Google Drive URL']
+    has_url = urls.map(lambda url: isinstance(url, str) and url.startswith('http'))
+    for title in titles[titles.notna() & ~has_url]:
+        logging.warning(f"Skipping invalid Google Drive URL for video: {title}")
+    valid = titles.notna() & has_url
+    df = df[valid]
+    
+    # Get subject, topic, and subtopic
+    subject = _optional_column(df, 'Subject', sheet_name)
+    topic = _optional_column(df, 'Topic')
+    subtopic = _optional_column(df, 'Sub Topic')  # Updated column name
+    
+    # Create the folder structure
+    folder = root_folder + os.sep + subject
+    folder = folder.where(topic == '', folder + os.sep + topic)
+    folder = folder.where(subtopic == '', folder + os.sep + subtopic)
+    
+    # Create a safe filename
+    titles = df['Video Title']
+    file_names = titles.astype(str).str.replace(UNSAFE_FILENAME_CHARS, '', regex=True).str.strip().str.replace(' ', '_')
+    
+    table = pd.DataFrame({
+        'sheet': sheet_name,
+        'index': df.index,
+        'title': titles,
+        'url': df['Google Drive URL'],
+        'subject': subject,
+        'topic': topic,
+        'subtopic': subtopic,
+        'folder': folder,
+        'output_path': folder + os.sep + file_names + '.mp4'
+    }, index=df.index)
+    table['key'] = table['url'].map(video_key)
+    table['row_hash'] = [
+        catalog_row_hash(sheet_name, *fields)
+        for fields in zip(table['title'], table['url'], table['subject'], table['topic'], table['subtopic'])
+    ]
+    return table[JOB_COLUMNS]
+
+class DownloadManifest:
+    """SQLite record of downloaded videos keyed by Drive file ID.
+    
+    Lets a re-run find everything that is already on disk with one query instead
+    of probing every target path, and move a video whose folder changed in the
+    spreadsheet instead of downloading it again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS downloads ("
+                "file_id TEXT PRIMARY KEY, url TEXT, path TEXT, size INTEGER, "
+                "sha256 TEXT, status TEXT, updated_at REAL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS catalog_rows ("
+                "row_hash TEXT PRIMARY KEY, sheet TEXT, file_id TEXT, path TEXT, synced_at REAL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, value TEXT)"
+            )
+
+    def completed(self):
+        """Return {file_id: (path, size)} for every successfully downloaded video."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT file_id, path, size FROM downloads WHERE status = 'done'"
+            ).fetchall()
+        return {file_id: (path, size) for file_id, path, size in rows}
+
+    def record(self, file_id, url, path, status, size=None, sha256=None):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO downloads (file_id, url, path, size, sha256, status, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(file_id) DO UPDATE SET url = excluded.url, path = excluded.path, "
+                "size = COALESCE(excluded.size, size), sha256 = COALESCE(excluded.sha256, sha256), "
+                "status = excluded.status, updated_at = excluded.updated_at",
+                (file_id, url, path, size, sha256, status, time.time())
+            )
+
+    def find_sha256(self, sha256, exclude_file_id):
+        """Return the path of another finished download with the same content, if any."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT path FROM downloads WHERE sha256 = ? AND status = 'done' AND file_id != ? LIMIT 1",
+                (sha256, exclude_file_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def move(self, file_id, path):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE downloads SET path = ?, updated_at = ? WHERE file_id = ?",
+                (path, time.time(), file_id)
+            )
+
+    def synced_rows(self):
+        """Return {row_hash: (sheet, file_id, path)} for the catalog rows of the last sync."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT row_hash, sheet, file_id, path FROM catalog_rows"
+            ).fetchall()
+        return {row_hash: (sheet, file_id, path) for row_hash, sheet, file_id, path in rows}
+
+    def mark_synced(self, jobs):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO catalog_rows (row_hash, sheet, file_id, path, synced_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(job['row_hash'], job['sheet'], job['key'], job['output_path'], now) for job in jobs]
+            )
+
+    def forget_rows(self, row_hashes):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM catalog_rows WHERE row_hash = ?",
+                [(row_hash,) for row_hash in row_hashes]
+            )
+
+    def get_state(self, name, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, name, value):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)",
+                (name, str(value))
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class JobQueue:
+    """Durable SQLite queue of the download jobs of a root folder.
+    
+    The spreadsheet stage enqueues every video to download and the download
+    loop claims, completes or fails them. A failed job is retried with
+    exponential backoff (retry_delay, then twice that, ...) until it has
+    failed max_attempts times, when it moves to the dead-letter list and is
+    no longer retried. Failures where the server could not be reached are
+    transient: they are retried the same way but never count as attempts,
+    so an outage cannot fill the dead-letter list. Jobs left 'running' by a
+    crashed run are queued again on startup, and the backoff schedule
+    survives restarts.
+    
+    This is the outermost of three retry layers: the shared HTTP session
+    retries a failed request (HTTP_RETRIES times), download_from_drive
+    resumes an interrupted transfer (3 attempts), and the queue retries the
+    whole download here. During an outage VideoDownloader stops sending
+    requests to the host after HOST_FAILURE_LIMIT network failures in a row,
+    so the other jobs fail at once instead of each going through the inner
+    layers.
+    """
+
+    def __init__(self, path, max_attempts=3, retry_delay=30.0):
+        self.path = path
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_delay = retry_delay
+        # Transient failures per job in this run; they are not stored as attempts
+        self.transient_failures = {}
+        self.lock = Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "key TEXT PRIMARY KEY, url TEXT, path TEXT, title TEXT, status TEXT, "
+                "attempts INTEGER DEFAULT 0, next_attempt_at REAL DEFAULT 0, last_error TEXT, updated_at REAL)"
+            )
+            recovered = self.conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+        if recovered:
+            logging.info(f"Re-queued {recovered} downloads interrupted by the previous run")
+
+    def enqueue(self, jobs):
+        """Add jobs to the queue; jobs already queued keep their attempts and backoff, dead letters stay dead."""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO jobs (key, url, path, title, status, attempts, next_attempt_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', 0, 0, ?) "
+                "ON CONFLICT(key) DO UPDATE SET url = excluded.url, path = excluded.path, title = excluded.title, "
+                "attempts = CASE WHEN status = 'done' THEN 0 ELSE attempts END, "
+                "status = CASE WHEN status IN ('dead', 'failed') THEN status ELSE 'queued' END, "
+                "updated_at = excluded.updated_at",
+                [(job['key'], job['url'], job['output_path'], str(job['title']), now) for job in jobs]
+            )
+
+    def dead_letters(self):
+        """Return {key: (url, path, attempts, last_error)} for the jobs that are no longer retried."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT key, url, path, attempts, last_error FROM jobs WHERE status = 'dead'"
+            ).fetchall()
+        return {key: (url, path, attempts, last_error) for key, url, path, attempts, last_error in rows}
+
+    def requeue_dead(self):
+        """Give every dead-letter job a fresh set of attempts. Returns the number of jobs re-queued."""
+        with self.lock, self.conn:
+            return self.conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, next_attempt_at = 0, updated_at = ? "
+                "WHERE status = 'dead'",
+                (time.time(),)
+            ).rowcount
+
+    def due_times(self, keys):
+        """Return {key: time of the next allowed attempt} for the given job keys."""
+        keys = set(keys)
+        with self.lock:
+            rows = self.conn.execute("SELECT key, next_attempt_at FROM jobs").fetchall()
+        return {key: next_attempt_at or 0 for key, next_attempt_at in rows if key in keys}
+
+    def _set_status(self, keys, status):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE key = ?",
+                [(status, time.time(), key) for key in keys]
+            )
+
+    def claim(self, jobs):
+        """Mark jobs as running and return them."""
+        self._set_status([job['key'] for job in jobs], 'running')
+        return jobs
+
+    def complete(self, key):
+        self._set_status([key], 'done')
+
+    def release(self, key):
+        """Put a job that was stopped (not failed) back in the queue."""
+        self._set_status([key], 'queued')
+
+    def fail(self, key, error, transient=False):
+        """Record a failed attempt. Returns the delay before the retry, or None if the job is not retried in this run.
         
-        # Skip the first few sheets that don't contain video data
-        skip_sheets = ['Introduction - تعارف', 'Watching Duration - دیکھنے کا د', 'Review Allocation']
-        sheet_names = [sheet for sheet in sheet_names if sheet not in skip_sheets]
+        A job that failed max_attempts times becomes a dead letter. A transient
+        failure leaves the stored attempts unchanged; after max_attempts of them
+        in this run the job is left 'failed' for the next run instead.
+        """
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT attempts FROM jobs WHERE key = ?", (key,)).fetchone()
+            attempts = row[0] if row else 0
+            if transient:
+                failures = self.transient_failures[key] = self.transient_failures.get(key, 0) + 1
+            else:
+                attempts += 1
+                failures = attempts
+            if failures >= self.max_attempts:
+                status, delay = ('failed' if transient else 'dead'), None
+            else:
+                status, delay = 'failed', self.retry_delay * 2 ** (failures - 1)
+            now = time.time()
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ? "
+                "WHERE key = ?",
+                (status, attempts, now + (delay or 0), str(error), now, key)
+            )
+        return delay
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def _object_status_columns(sheets):
+    """Store the existing 'Download Status' columns as objects so that string statuses fit.
+    
+    A column that is empty in the workbook is read as float64, which pandas 3
+    refuses to put a string into.
+    """
+    for df in sheets.values():
+        if 'Download Status' in df.columns:
+            df['Download Status'] = df['Download Status'].astype(object)
+
+class StatusWriter:
+    """Collect per-row download statuses and write the processed workbook in one go.
+    
+    The workbook is rewritten as a whole (via a temporary file, so a crash never
+    leaves a half-written file) at most every `flush_interval` seconds and on
+    close. With `status_log` set, every status is also appended to a JSON Lines
+    file and synced to disk immediately.
+    """
+
+    def __init__(self, output_excel, sheets, flush_interval=300, status_log=None):
+        self.output_excel = output_excel
+        self.sheets = sheets
+        _object_status_columns(sheets)
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+        self.dirty = False
+        self.log_file = open(status_log, 'a', encoding='utf-8') if status_log else None
+
+    def update(self, job, status):
+        df = self.sheets[job['sheet']]
+        if job.get('playlist_entry') and status == 'Downloaded' and 'Download Status' in df.columns:
+            # A playlist row is only 'Downloaded' if none of its videos failed
+            if df.at[job['index'], 'Download Status'] in ('Failed', 'Error', 'Cancelled'):
+                status = df.at[job['index'], 'Download Status']
+        df.at[job['index'], 'Download Status'] = status
+        self.dirty = True
+        if self.log_file:
+            self.log_file.write(json.dumps({
+                'time': time.time(),
+                'sheet': job['sheet'],
+                'row': int(job['index']),
+                'title': str(job['title']),
+                'url': job['url'],
+                'path': job['output_path'],
+                'status': status
+            }, ensure_ascii=False) + '\n')
+            self.log_file.flush()
+            os.fsync(self.log_file.fileno())
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        import pandas as pd
         
-        # Process each sheet
-        for sheet_name in sheet_names:
-            logging.info(f"Processing sheet: {sheet_name}")
-            
-            # Read the sheet
-            df = pd.read_excel(spreadsheet_path, sheet_name=sheet_name)
-            
-            # Process each video
-            for index, row in df.iterrows():
-                try:
-                    video_title = row['Video Title']
-                    if pd.isna(video_title):
-                        continue
-                        
-                    # Get the Google Drive URL
-                    drive_url = row['Google Drive URL']
-                    if pd.isna(drive_url) or not isinstance(drive_url, str) or not drive_url.startswith('http'):
-                        logging.warning(f"Skipping invalid Google Drive URL for video: {video_title}")
-                        continue
-                    
-                    # Get subject, topic, and subtopic
-                    subject = row.get('Subject', sheet_name)
-                    topic = row.get('Topic', '')
-                    subtopic = row.get('Sub Topic', '')  # Updated column name
-                    
-                    # Create the folder structure
-                    folder_path = os.path.join(root_folder, subject)
-                    if topic and not pd.isna(topic):
-                        folder_path = os.path.join(folder_path, topic)
-                    if subtopic and not pd.isna(subtopic):
-                        folder_path = os.path.join(folder_path, subtopic)
-                    
-                    # Create all necessary directories
-                    os.makedirs(folder_path, exist_ok=True)
-                    
-                    # Create a safe filename
-                    safe_filename = "".join(c for c in video_title if c.isalnum() or c in (' ', '-', '_')).strip()
-                    safe_filename = safe_filename.replace(' ', '_')
-                    output_path = os.path.join(folder_path, f"{safe_filename}.mp4")
-                    
-                    # Skip if already downloaded
-                    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                        logging.info(f"Video already exists: {output_path}")
-                        continue
-                    
-                    # Download the video
-                    logging.info(f"Downloading: {video_title}")
-                    if download_from_drive(drive_url, output_path):
-                        # Update the status in the DataFrame
-                        df.at[index, 'Download Status'] = 'Downloaded'
-                    else:
-                        df.at[index, 'Download Status'] = 'Failed'
-                        
-                    # Add a small delay between downloads
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    logging.error(f"Error processing video {video_title}: {str(e)}")
-                    df.at[index, 'Download Status'] = 'Error'
-            
-            # Save the processed sheet
-            output_excel = f"{os.path.splitext(spreadsheet_path)[0]}_processed.xlsx"
-            with pd.ExcelWriter(output_excel, engine='openpyxl', mode='a' if os.path.exists(output_excel) else 'w') as writer:
+        base_path, extension = os.path.splitext(self.output_excel)
+        tmp_path = f"{base_path}.tmp{extension}"
+        with pd.ExcelWriter(tmp_path, engine='openpyxl') as writer:
+            for sheet_name, df in self.sheets.items():
                 df.to_excel(writer, sheet_name=sheet_name, index=False)
-            
+        os.replace(tmp_path, self.output_excel)
+        self.last_flush = time.monotonic()
+        self.dirty = False
+
+    def close(self):
+        self.flush()
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+
+# Ways of splitting a catalog between ingest nodes
+SHARD_KEYS = ('file', 'sheet')
+
+def parse_shard(value):
+    """Parse a 'K/N' shard spec (shard K of N, counting from 1) into a (K, N) tuple."""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', value)
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"Invalid shard {value!r}, expected K/N with 1 <= K <= N")
+    return int(match.group(1)), int(match.group(2))
+
+def shard_suffix(shard):
+    """File name suffix of the per-shard state and status files, '' when not sharded."""
+    return f"_shard{shard[0]}of{shard[1]}" if shard else ''
+
+def shard_of(job, shard_count, by='file'):
+    """Return the shard (1 to shard_count) a job belongs to.
+    
+    Jobs are assigned by a hash of their sheet name or of their Drive file ID
+    (the URL for YouTube). hashlib is used instead of hash(), which differs
+    between processes, so every node computes the same assignment. Hashing
+    the file ID keeps every row of a video in the same shard.
+    """
+    value = job['sheet'] if by == 'sheet' else job['key']
+    digest = hashlib.sha1(str(value).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shard_count + 1
+
+def merge_shard_statuses(excel_path, shard_count, by='file'):
+    """Combine the per-shard status workbooks of excel_path into a single _processed.xlsx.
+    
+    Every row takes the status written by the shard that shard_of() assigns
+    it to, so a status the other shards carried over from the input workbook
+    never wins; by must match the --shard-by of the shard runs. Returns the
+    path of the merged workbook.
+    """
+    import pandas as pd
+    
+    base_path = os.path.splitext(excel_path)[0]
+    shards = {}
+    for k in range(1, shard_count + 1):
+        shard_path = f"{base_path}_processed{shard_suffix((k, shard_count))}.xlsx"
+        if not os.path.exists(shard_path):
+            logging.warning(f"Status of shard {k}/{shard_count} not found: {shard_path}")
+            continue
+        shards[k] = pd.read_excel(shard_path, sheet_name=None)
+    if not shards:
+        raise FileNotFoundError(f"No shard status files found for {excel_path}")
+    
+    # Every shard file holds all rows; start from one and copy in each owner's statuses
+    merged = next(iter(shards.values()))
+    for sheet_name, target in merged.items():
+        if 'Google Drive URL' not in target.columns:
+            continue
+        owners = target['Google Drive URL'].map(
+            lambda url: shard_of({'sheet': sheet_name, 'key': video_key(url)}, shard_count, by)
+            if isinstance(url, str) and url.startswith('http') else None
+        )
+        if 'Download Status' in target.columns:
+            statuses = target['Download Status'].astype(object)
+        else:
+            statuses = pd.Series(None, index=target.index, dtype=object)
+        for k, sheets in shards.items():
+            df = sheets.get(sheet_name)
+            if df is None or 'Download Status' not in df.columns:
+                continue
+            rows = owners == k
+            statuses[rows] = df['Download Status'].reindex(target.index)[rows]
+        target['Download Status'] = statuses
+    
+    output_excel = f"{base_path}_processed.xlsx"
+    StatusWriter(output_excel, merged).close()
+    logging.info(f"Merged the status of {shard_count} shards into {output_excel}")
+    return output_excel
+
+def _run_shard(source, root_folder, shard, options):
+    """Child process of run_local_shards: download one shard."""
+    downloader = VideoDownloader(root_folder, shard=shard, **options)
+    if os.path.isfile(source):
+        return downloader.process_workbook(source)
+    return downloader.download_videos(source)
+
+def run_local_shards(source, root_folder, shard_count, **options):
+    """Download every shard of a catalog in its own local process, then merge their statuses.
+    
+    Stands in for shard_count ingest nodes sharing root_folder. options are
+    passed on to each shard's VideoDownloader. Returns the summed summary.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=shard_count, mp_context=context) as executor:
+        futures = [executor.submit(_run_shard, source, root_folder, (k, shard_count), options)
+                   for k in range(1, shard_count + 1)]
+        summaries = [future.result() for future in futures]
+    
+    summary = {}
+    for shard_summary in summaries:
+        for name, count in shard_summary.items():
+            summary[name] = summary.get(name, 0) + count
+    excel_path = source if os.path.isfile(source) else os.path.join(os.path.abspath(root_folder), 'KAUvideos.xlsx')
+    merge_shard_statuses(excel_path, shard_count, options.get('shard_by', 'file'))
+    return summary
+
+def _distribution(values):
+    """Return count, mean, p50, p95 and max of a list of numbers."""
+    if not values:
+        return {'count': 0}
+    values = sorted(values)
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'p50': values[len(values) // 2],
+        'p95': values[min(len(values) - 1, int(len(values) * 0.95))],
+        'max': values[-1]
+    }
+
+class RunMetrics:
+    """Thread-safe collector of per-job download metrics and phase timings for a run.
+    
+    Every job gets its queue wait, time to first byte, download time,
+    throughput, retries, bytes and final status. phase() times a stage of the
+    run (spreadsheet parsing, path building, network I/O, ...). The aggregate
+    is available from summary() and can be written as JSON or in the
+    Prometheus text format.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.jobs = {}
+        self.phases = {}
+        self.started = time.time()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name, seconds):
+        with self.lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def record_job(self, job, **fields):
+        with self.lock:
+            record = self.jobs.setdefault(job['output_path'], {'title': str(job['title']), 'url': job['url']})
+            record.update(fields)
+
+    def job(self, job):
+        """Return the timings and counters recorded for a job."""
+        with self.lock:
+            record = dict(self.jobs.get(job['output_path'], {}))
+        for field in ('title', 'url', 'status'):
+            record.pop(field, None)
+        return record
+
+    def summary(self):
+        with self.lock:
+            jobs = [dict(record) for record in self.jobs.values()]
+            phases = dict(self.phases)
+        statuses = {}
+        for record in jobs:
+            status = record.get('status', 'Unknown')
+            statuses[status] = statuses.get(status, 0) + 1
+        total_bytes = sum(record.get('bytes', 0) for record in jobs)
+        wall_seconds = time.time() - self.started
+        network_seconds = phases.get('network') or wall_seconds
+        return {
+            'jobs': len(jobs),
+            'statuses': statuses,
+            'bytes': total_bytes,
+            'retries': sum(record.get('retries', 0) for record in jobs),
+            'wall_seconds': wall_seconds,
+            'throughput': total_bytes / network_seconds if network_seconds else 0.0,
+            'queue_wait': _distribution([record['queue_wait'] for record in jobs if 'queue_wait' in record]),
+            'ttfb': _distribution([record['ttfb'] for record in jobs if 'ttfb' in record]),
+            'job_throughput': _distribution([record['throughput'] for record in jobs if 'throughput' in record]),
+            'phases': phases
+        }
+
+    def to_prometheus(self, prefix='video_downloader'):
+        """Render the run summary in the Prometheus text exposition format."""
+        summary = self.summary()
+        lines = []
+        
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+                lines.append(f"{prefix}_{name}{suffix}{{{label_text}}} {value}" if label_text
+                             else f"{prefix}_{name}{suffix} {value}")
+        
+        metric('jobs_total', 'counter', "Download jobs by final status",
+               [('', {'status': status}, count) for status, count in sorted(summary['statuses'].items())])
+        metric('bytes_total', 'counter', "Bytes received", [('', {}, summary['bytes'])])
+        metric('retries_total', 'counter', "Download attempts that were retried", [('', {}, summary['retries'])])
+        metric('run_duration_seconds', 'gauge', "Wall time of the run", [('', {}, f"{summary['wall_seconds']:.3f}")])
+        metric('throughput_bytes_per_second', 'gauge', "Bytes received per second of network phase",
+               [('', {}, f"{summary['throughput']:.1f}")])
+        metric('phase_duration_seconds', 'gauge', "Time spent per phase of the run",
+               [('', {'phase': name}, f"{seconds:.3f}") for name, seconds in sorted(summary['phases'].items())])
+        for name, help_text in (('queue_wait', "Time jobs waited for a worker"),
+                                ('ttfb', "Time to first byte of a download")):
+            distribution = summary[name]
+            samples = [('', {'quantile': quantile}, f"{distribution[key]:.3f}")
+                       for quantile, key in (('0.5', 'p50'), ('0.95', 'p95')) if key in distribution]
+            samples.append(('_sum', {}, f"{distribution.get('mean', 0) * distribution['count']:.3f}"))
+            samples.append(('_count', {}, distribution['count']))
+            metric(f'job_{name}_seconds', 'summary', help_text, samples)
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the metrics to path: Prometheus text for .prom files, JSON with every job otherwise."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if path.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                with self.lock:
+                    jobs = [dict(record, path=path) for path, record in self.jobs.items()]
+                json.dump({'summary': self.summary(), 'jobs': jobs}, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+def process_videos_all_sheets(root_folder, spreadsheet_path):
+    """Process all sheets in the Excel file and download videos."""
+    try:
+        VideoDownloader(root_folder).process_workbook(spreadsheet_path)
         logging.info("\nAll videos have been downloaded and organized successfully!")
         
     except Exception as e:
@@ -247,10 +1678,25 @@ def process_videos_all_sheets(root_folder, spreadsheet_path):
         raise
 
 class VideoDownloaderGUI:
+    # How often the Tk main loop drains the progress event queue (milliseconds)
+    POLL_INTERVAL = 100
+    # Window over which the download speed is averaged (seconds)
+    SPEED_WINDOW = 3.0
+
     def __init__(self, root):
+        import tkinter as tk
+        from tkinter import ttk
+        
         self.root = root
         self.root.title("KAU Video Downloader")
-        self.root.geometry("600x400")
+        self.root.geometry("600x500")
+        
+        # Events from the download thread; only the Tk main loop touches the widgets
+        self.events = queue.Queue()
+        self.control = None
+        self.jobs_total = 0
+        self.jobs_done = 0
+        self.speed_samples = []
         
         # Create main frame
         main_frame = ttk.Frame(root, padding="10")
@@ -267,32 +1713,119 @@ class VideoDownloaderGUI:
         self.dir_entry.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=5)
         ttk.Button(main_frame, text="Browse", command=self.browse_directory).grid(row=3, column=1, padx=5)
         
-        # Progress Bar
+        # Sync Mode
+        self.incremental_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="Only download new or changed rows",
+                        variable=self.incremental_var).grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=5)
+        self.retry_dead_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="Retry videos that failed too often in earlier runs",
+                        variable=self.retry_dead_var).grid(row=5, column=0, columnspan=2, sticky=tk.W)
+        
+        # Overall Progress
+        self.overall_label = ttk.Label(main_frame, text="Overall progress")
+        self.overall_label.grid(row=6, column=0, columnspan=2, sticky=tk.W)
         self.progress = ttk.Progressbar(main_frame, length=400, mode='determinate')
-        self.progress.grid(row=4, column=0, columnspan=2, pady=10)
+        self.progress.grid(row=7, column=0, columnspan=2, pady=5)
+        
+        # Current File Progress
+        self.file_label = ttk.Label(main_frame, text="Current file")
+        self.file_label.grid(row=8, column=0, columnspan=2, sticky=tk.W)
+        self.file_progress = ttk.Progressbar(main_frame, length=400, mode='determinate')
+        self.file_progress.grid(row=9, column=0, columnspan=2, pady=5)
+        
+        # Speed Label
+        self.speed_label = ttk.Label(main_frame, text="")
+        self.speed_label.grid(row=10, column=0, columnspan=2, pady=5)
         
         # Status Label
         self.status_label = ttk.Label(main_frame, text="")
-        self.status_label.grid(row=5, column=0, columnspan=2, pady=5)
+        self.status_label.grid(row=11, column=0, columnspan=2, pady=5)
         
-        # Execute Button
-        self.execute_button = ttk.Button(main_frame, text="Start Download", command=self.start_download)
-        self.execute_button.grid(row=6, column=0, columnspan=2, pady=10)
+        # Execute, Pause and Cancel Buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=12, column=0, columnspan=2, pady=10)
+        self.execute_button = ttk.Button(button_frame, text="Start Download", command=self.start_download)
+        self.execute_button.grid(row=0, column=0, padx=5)
+        self.pause_button = ttk.Button(button_frame, text="Pause", command=self.toggle_pause, state='disabled')
+        self.pause_button.grid(row=0, column=1, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_download, state='disabled')
+        self.cancel_button.grid(row=0, column=2, padx=5)
         
         # Configure grid weights
         main_frame.columnconfigure(0, weight=1)
         
+        self.root.after(self.POLL_INTERVAL, self.process_events)
+        
     def browse_directory(self):
+        import tkinter as tk
+        from tkinter import filedialog
+        
         directory = filedialog.askdirectory()
         if directory:
             self.dir_entry.delete(0, tk.END)
             self.dir_entry.insert(0, directory)
     
     def update_status(self, message):
-        self.status_label.config(text=message)
-        self.root.update()
+        """Queue a status message; safe to call from any thread."""
+        self.events.put({'event': 'status', 'message': message})
+    
+    def process_events(self):
+        """Apply every queued event to the widgets, keeping only the latest status and file progress."""
+        status = None
+        file_event = None
+        finished = None
+        bytes_downloaded = None
+        try:
+            while True:
+                event = self.events.get_nowait()
+                kind = event['event']
+                if kind == 'status':
+                    status = event['message']
+                elif kind == 'queued':
+                    self.jobs_total = event['jobs']
+                    self.jobs_done = 0
+                elif kind == 'job':
+                    self.jobs_done += 1
+                elif kind == 'progress':
+                    file_event = event
+                    bytes_downloaded = event['bytes_downloaded']
+                elif kind in ('done', 'error'):
+                    finished = event
+        except queue.Empty:
+            pass
+        
+        if status is not None:
+            self.status_label.config(text=status)
+        if self.jobs_total:
+            self.progress.config(maximum=self.jobs_total, value=self.jobs_done)
+            self.overall_label.config(text=f"Overall progress: {self.jobs_done}/{self.jobs_total} videos")
+        if file_event is not None:
+            self.file_progress.config(maximum=file_event['total'], value=file_event['downloaded'])
+            self.file_label.config(text=f"Current file: {file_event['title']} "
+                                        f"({file_event['downloaded'] / 1048576:.1f}/{file_event['total'] / 1048576:.1f} MB)")
+        self.update_speed(bytes_downloaded)
+        if finished is not None:
+            self.finish_download(finished)
+        
+        self.root.after(self.POLL_INTERVAL, self.process_events)
+    
+    def update_speed(self, bytes_downloaded):
+        if self.control is None:
+            return
+        now = time.monotonic()
+        if bytes_downloaded is None:
+            bytes_downloaded = self.speed_samples[-1][1] if self.speed_samples else 0
+        self.speed_samples.append((now, bytes_downloaded))
+        while self.speed_samples and now - self.speed_samples[0][0] > self.SPEED_WINDOW:
+            self.speed_samples.pop(0)
+        first_time, first_bytes = self.speed_samples[0]
+        if now > first_time:
+            speed = (bytes_downloaded - first_bytes) / (now - first_time)
+            self.speed_label.config(text=f"{speed / 1048576:.2f} MB/s, {bytes_downloaded / 1048576:.1f} MB downloaded")
     
     def start_download(self):
+        from tkinter import messagebox
+        
         url = self.url_entry.get().strip()
         directory = self.dir_entry.get().strip()
         
@@ -306,57 +1839,176 @@ class VideoDownloaderGUI:
         
         # Disable the execute button while downloading
         self.execute_button.config(state='disabled')
+        self.pause_button.config(state='normal', text="Pause")
+        self.cancel_button.config(state='normal')
+        self.control = DownloadControl()
+        self.jobs_total = 0
+        self.jobs_done = 0
+        self.speed_samples = []
         
         # Start download in a separate thread
-        Thread(target=self.download_process, args=(url, directory), daemon=True).start()
+        Thread(target=self.download_process, args=(url, directory, self.incremental_var.get(), self.retry_dead_var.get()),
+               daemon=True).start()
+    
+    def toggle_pause(self):
+        if self.control.paused:
+            self.control.resume()
+            self.pause_button.config(text="Pause")
+            self.status_label.config(text="Resuming...")
+        else:
+            self.control.pause()
+            self.pause_button.config(text="Resume")
+            self.status_label.config(text="Paused")
     
-    def download_process(self, url, directory):
+    def cancel_download(self):
+        self.control.cancel()
+        self.pause_button.config(state='disabled')
+        self.cancel_button.config(state='disabled')
+        self.status_label.config(text="Cancelling...")
+    
+    def download_process(self, url, directory, incremental, retry_dead=False):
+        """Run the download on a worker thread, reporting back only through the event queue."""
         try:
             self.update_status("Starting download process...")
             
             # Validate URL
-            response = requests.head(url)
+            response = get_http_session().head(url)
             if response.status_code != 200:
-                self.update_status(f"Error: Invalid URL (Status code: {response.status_code})")
-                messagebox.showerror("Error", f"Invalid URL (Status code: {response.status_code})")
-                self.execute_button.config(state='normal')
+                self.events.put({'event': 'error', 'message': f"Invalid URL (Status code: {response.status_code})"})
                 return
             
-            # Create downloader instance with status callback
-            downloader = VideoDownloader(directory, status_callback=self.update_status)
+            # Create downloader instance reporting progress events into the queue
+            downloader = VideoDownloader(directory, event_callback=self.events.put,
+                                         incremental=incremental, control=self.control)
+            if retry_dead:
+                logging.info(f"Re-queued {downloader.job_queue.requeue_dead()} videos from the dead-letter list")
             
             # Start download
             self.update_status("Downloading videos...")
-            downloader.download_videos(url)
-            
-            self.update_status("Download completed successfully!")
-            messagebox.showinfo("Success", "All videos have been downloaded successfully!")
+            summary = downloader.download_videos(url)
+            self.events.put({'event': 'done', 'summary': summary})
             
         except Exception as e:
-            self.update_status(f"Error: {str(e)}")
-            messagebox.showerror("Error", str(e))
-        finally:
-            self.execute_button.config(state='normal')
+            self.events.put({'event': 'error', 'message': str(e)})
+    
+    def finish_download(self, event):
+        from tkinter import messagebox
+        
+        self.execute_button.config(state='normal')
+        self.pause_button.config(state='disabled', text="Pause")
+        self.cancel_button.config(state='disabled')
+        
+        if event['event'] == 'error':
+            self.status_label.config(text=f"Error: {event['message']}")
+            messagebox.showerror("Error", event['message'])
+            return
+        
+        summary = event['summary']
+        if summary['cancelled']:
+            self.status_label.config(text="Download cancelled")
+            messagebox.showinfo("Cancelled", f"Download cancelled after {summary['downloaded']} videos.")
+        elif summary['failed'] or summary['errors']:
+            message = f"{summary['downloaded']} videos downloaded, {summary['failed'] + summary['errors']} failed."
+            if summary['dead_letter']:
+                message += f" {summary['dead_letter']} failed too often and are skipped until retried from the checkbox."
+            self.status_label.config(text=message)
+            messagebox.showwarning("Finished with errors", message)
+        else:
+            self.status_label.config(text="Download completed successfully!")
+            messagebox.showinfo("Success", "All videos have been downloaded successfully!")
+
+# Download engines: a thread pool of blocking requests, or one asyncio event loop multiplexing aiohttp streams
+ENGINES = ('threads', 'asyncio')
 
 class VideoDownloader:
-    def __init__(self, root_folder, status_callback=None):
+    def __init__(self, root_folder, status_callback=None, max_workers=4, per_host_limit=2, rate_limit=2.0,
+                 segments=DEFAULT_SEGMENTS, segment_threshold=DEFAULT_SEGMENT_THRESHOLD,
+                 http_timeout=HTTP_TIMEOUT, http_retries=HTTP_RETRIES, incremental=False, delete_removed=False,
+                 status_flush_interval=300, status_log=False, event_callback=None, include_sheets=None, exclude_sheets=None,
+                 control=None, youtube_batch_size=10, youtube_fragments=4,
+                 chunk_size=DEFAULT_CHUNK_SIZE, write_buffer=DEFAULT_WRITE_BUFFER,
+                 bandwidth_limit=None, office_hours=None, office_hours_limit=None, metrics_path=None,
+                 engine='threads', max_attempts=3, retry_delay=30.0, shard=None, shard_by='file'):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown download engine: {engine} (choose from {', '.join(ENGINES)})")
+        if shard_by not in SHARD_KEYS:
+            raise ValueError(f"Unknown shard key: {shard_by} (choose from {', '.join(SHARD_KEYS)})")
+        self.engine = engine
+        self.shard = shard
+        self.shard_by = shard_by
         self.root_folder = os.path.abspath(root_folder)
         self.status_callback = status_callback
+        self.event_callback = event_callback
+        self.control = control or DownloadControl()
+        self.chunk_size = chunk_size
+        self.write_buffer = write_buffer
+        
+        # Optional global bandwidth cap (bytes/s), lowered during office hours if configured
+        if bandwidth_limit or office_hours:
+            schedule = None
+            if office_hours:
+                schedule = office_hours_schedule(office_hours[0], office_hours[1], office_hours_limit, bandwidth_limit)
+            self.control.bandwidth = TokenBucket(bandwidth_limit, schedule=schedule)
+        self.bytes_downloaded = 0
+        self.progress_lock = Lock()
+        # Circuit breaker: host -> (network failures in a row, time of the last one)
+        self.host_failures = {}
+        self.metrics = RunMetrics()
+        if metrics_path and shard:
+            # One metrics file per shard, e.g. run_shard2of4.json
+            metrics_base, extension = os.path.splitext(metrics_path)
+            metrics_path = f"{metrics_base}{shard_suffix(shard)}{extension}"
+        self.metrics_path = metrics_path
+        self.include_sheets = list(include_sheets or [])
+        self.exclude_sheets = list(exclude_sheets or [])
+        self.status_flush_interval = status_flush_interval
+        self.status_log = status_log
+        self.incremental = incremental
+        self.delete_removed = delete_removed
+        self.segments = segments
+        self.segment_threshold = segment_threshold
+        self.youtube_batch_size = max(1, int(youtube_batch_size))
+        self.youtube_fragments = youtube_fragments
+        self.scheduler = DownloadScheduler(max_workers, per_host_limit, rate_limit)
+        
+        # Size the shared connection pool for every worker and segment in flight
+        configure_http_session(
+            pool_size=max(HTTP_POOL_SIZE, max_workers * max(1, segments)),
+            retries=http_retries,
+            timeout=http_timeout
+        )
         logging.info(f"Using root folder: {self.root_folder}")
         
         # Create root folder if it doesn't exist
         os.makedirs(self.root_folder, exist_ok=True)
         
-        # Initialize Excel writer
-        self.excel_path = os.path.join(self.root_folder, 'downloaded_videos.xlsx')
-        self.writer = pd.ExcelWriter(self.excel_path, engine='openpyxl')
         self.downloaded_videos = []
+        
+        # Record of what is already downloaded, so re-runs don't probe every path
+        # Shards sharing a root folder keep separate state files
+        suffix = shard_suffix(shard)
+        self.manifest = DownloadManifest(os.path.join(self.root_folder, f'download_manifest{suffix}.db'))
+        
+        # Durable queue of the downloads still to do, with their retry state
+        self.job_queue = JobQueue(os.path.join(self.root_folder, f'download_queue{suffix}.db'), max_attempts, retry_delay)
 
     def update_status(self, message):
         if self.status_callback:
             self.status_callback(message)
+        self.emit('status', message=message)
         logging.info(message)
 
+    def emit(self, event, **fields):
+        """Send a machine-readable progress event to the event callback, if any."""
+        if self.event_callback:
+            self.event_callback({'event': event, 'time': time.time(), **fields})
+
+    def sheet_selected(self, sheet_name):
+        """Apply the include/exclude glob patterns to a sheet name."""
+        if self.include_sheets and not any(fnmatch.fnmatch(sheet_name, pattern) for pattern in self.include_sheets):
+            return False
+        return not any(fnmatch.fnmatch(sheet_name, pattern) for pattern in self.exclude_sheets)
+
     def download_videos(self, url):
         try:
             self.update_status("Validating URL...")
@@ -371,117 +2023,730 @@ class VideoDownloader:
                 if '/spreadsheets/d/' in url:
                     # Extract the file ID from the URL
                     file_id = url.split('/spreadsheets/d/')[1].split('/')[0]
-                    url = f"https://docs.google.com/spreadsheets/d/{file_id}/export?format=xlsx"
+                    url = SPREADSHEET_EXPORT_URL.format(file_id=file_id)
                 elif '/file/d/' in url:
                     file_id = url.split('/file/d/')[1].split('/')[0]
-                    url = f"https://drive.google.com/uc?export=download&id={file_id}"
+                    url = DRIVE_DOWNLOAD_URL.format(file_id=file_id)
                 elif '/open?id=' in url:
                     file_id = url.split('id=')[1].split('&')[0]
-                    url = f"https://drive.google.com/uc?export=download&id={file_id}"
+                    url = DRIVE_DOWNLOAD_URL.format(file_id=file_id)
             except Exception as e:
                 logging.error(f"Error parsing URL: {str(e)}")
                 raise ValueError("Could not parse the Google Drive URL. Please make sure it's a valid sharing link.")
             
             # Download the Excel file
             self.update_status("Downloading spreadsheet...")
-            response = requests.get(url)
-            response.raise_for_status()
+            with self.metrics.phase('spreadsheet_download'):
+                response = get_http_session().get(url)
+                response.raise_for_status()
+                
+                # Save the Excel file; shards sharing the folder each write a copy and swap it in
+                excel_path = os.path.join(self.root_folder, 'KAUvideos.xlsx')
+                tmp_path = f"{excel_path}{shard_suffix(self.shard)}.download"
+                with open(tmp_path, 'wb') as f:
+                    f.write(response.content)
+                os.replace(tmp_path, excel_path)
             
-            # Save the Excel file
-            excel_path = os.path.join(self.root_folder, 'KAUvideos.xlsx')
-            with open(excel_path, 'wb') as f:
-                f.write(response.content)
+            summary = self.process_workbook(excel_path)
             
-            # Read all sheets
-            self.update_status("Reading spreadsheet...")
-            excel_file = pd.ExcelFile(excel_path)
-            sheet_names = excel_file.sheet_names
+            self.update_status("All videos have been downloaded and organized successfully!")
+            return summary
             
+        except Exception as e:
+            logging.error(f"Error downloading videos: {str(e)}")
+            raise
+
+    def process_workbook(self, excel_path):
+        """Download every video listed in the workbook and write the processed status file.
+        
+        In incremental mode only rows that are new or changed since the last
+        successful sync are downloaded, and an unchanged workbook is not parsed at all.
+        In sharded mode only the rows of this shard are downloaded, and the
+        statuses go to a per-shard file for merge_shard_statuses().
+        
+        Returns a summary dict with the number of rows per outcome.
+        """
+        import pandas as pd
+        
+        summary = {'rows': 0, 'unchanged': 0, 'skipped': 0, 'downloaded': 0, 'failed': 0, 'errors': 0, 'cancelled': 0,
+                   'linked': 0, 'retried': 0, 'dead_letter': 0}
+        
+        # The snapshot is only valid for the same workbook and the same sheet selection
+        workbook_hash = None
+        if self.incremental:
+            selection = json.dumps([self.include_sheets, self.exclude_sheets, self.shard, self.shard_by])
+            workbook_hash = f"{file_sha256(excel_path)}:{hashlib.sha1(selection.encode('utf-8')).hexdigest()}"
+        if (workbook_hash and self.manifest.get_state('workbook_sha256') == workbook_hash
+                and self.manifest.get_state('unsynced_rows') == '0'):
+            self.update_status("Spreadsheet unchanged since the last sync, nothing to do")
+            self.emit('summary', **summary)
+            return summary
+        
+        # Read all sheets in a single parse of the workbook
+        self.update_status("Reading spreadsheet...")
+        with self.metrics.phase('spreadsheet_parse'), pd.ExcelFile(excel_path) as excel_file:
             # Skip the first few sheets that don't contain video data
             skip_sheets = ['Introduction - تعارف', 'Watching Duration - دیکھنے کا د', 'Review Allocation']
-            sheet_names = [sheet for sheet in sheet_names if sheet not in skip_sheets]
-            
-            # Process each sheet
-            for sheet_name in sheet_names:
+            sheet_names = [sheet for sheet in excel_file.sheet_names
+                           if sheet not in skip_sheets and self.sheet_selected(sheet)]
+            sheets = pd.read_excel(excel_file, sheet_name=sheet_names)
+        
+        # Build the job table of every sheet up front so the worker pool stays busy across sheets
+        with self.metrics.phase('path_build'):
+            tables = []
+            for sheet_name, df in sheets.items():
                 self.update_status(f"Processing sheet: {sheet_name}")
-                
-                # Read the sheet
-                df = pd.read_excel(excel_path, sheet_name=sheet_name)
-                
-                # Process each video
-                for index, row in df.iterrows():
-                    try:
-                        video_title = row['Video Title']
-                        if pd.isna(video_title):
-                            continue
-                            
-                        # Get the Google Drive URL
-                        drive_url = row['Google Drive URL']
-                        if pd.isna(drive_url) or not isinstance(drive_url, str) or not drive_url.startswith('http'):
-                            logging.warning(f"Skipping invalid Google Drive URL for video: {video_title}")
-                            continue
-                        
-                        # Get subject, topic, and subtopic
-                        subject = row.get('Subject', sheet_name)
-                        topic = row.get('Topic', '')
-                        subtopic = row.get('Sub Topic', '')  # Updated column name
-                        
-                        # Create the folder structure
-                        folder_path = os.path.join(self.root_folder, subject)
-                        if topic and not pd.isna(topic):
-                            folder_path = os.path.join(folder_path, topic)
-                        if subtopic and not pd.isna(subtopic):
-                            folder_path = os.path.join(folder_path, subtopic)
-                        
-                        # Create all necessary directories
-                        os.makedirs(folder_path, exist_ok=True)
-                        
-                        # Create a safe filename
-                        safe_filename = "".join(c for c in video_title if c.isalnum() or c in (' ', '-', '_')).strip()
-                        safe_filename = safe_filename.replace(' ', '_')
-                        output_path = os.path.join(folder_path, f"{safe_filename}.mp4")
-                        
-                        # Skip if already downloaded
-                        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                            self.update_status(f"Video already exists: {video_title}")
+                tables.append(build_job_table(df, sheet_name, self.root_folder))
+            job_table = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=JOB_COLUMNS)
+            
+            # Create all necessary directories
+            for folder_path in job_table['folder'].unique():
+                os.makedirs(folder_path, exist_ok=True)
+            catalog = resolve_path_collisions(job_table.to_dict('records'))
+        
+        # A shard only handles the rows assigned to it
+        assigned = catalog
+        if self.shard:
+            shard, shard_count = self.shard
+            assigned = [job for job in catalog if shard_of(job, shard_count, self.shard_by) == shard]
+            self.update_status(f"Shard {shard}/{shard_count}: {len(assigned)} of {len(catalog)} rows")
+        
+        # Only rows that changed since the last sync need any work
+        removed = {}
+        if self.incremental:
+            jobs, removed = self._changed_jobs(assigned, sheets)
+        else:
+            jobs = assigned
+        
+        summary.update(rows=len(assigned), unchanged=len(assigned) - len(jobs))
+        
+        with self.metrics.phase('planning'):
+            # YouTube playlists become one job per video
+            jobs = self._expand_playlists(jobs)
+            
+            # Drop the videos that are already downloaded
+            pending = self._pending_jobs(jobs, catalog)
+        failed = set()
+        summary['skipped'] = len(jobs) - len(pending)
+        
+        # Download each Drive file once; rows listing the same file again are linked afterwards
+        primaries = {}
+        duplicates = {}
+        for job in pending:
+            if job['key'] in primaries:
+                duplicates.setdefault(job['key'], []).append(job)
+            else:
+                primaries[job['key']] = job
+        self.job_queue.enqueue(primaries.values())
+        dead_letters = self.job_queue.dead_letters()
+        self.emit('queued', jobs=len(pending), rows=len(assigned))
+        
+        # Statuses are collected in memory and the processed workbook is written in one go
+        base_path = os.path.splitext(excel_path)[0]
+        suffix = shard_suffix(self.shard)
+        status_writer = StatusWriter(
+            f"{base_path}_processed{suffix}.xlsx", sheets,
+            flush_interval=self.status_flush_interval,
+            status_log=f"{base_path}_status{suffix}.jsonl" if self.status_log else None
+        )
+        network_started = time.perf_counter()
+        try:
+            # Download concurrently and write each result back into its sheet
+            self.update_status(f"Downloading {len(primaries)} videos...")
+            waiting = []
+            outcomes = []
+            for job in primaries.values():
+                if job['key'] in dead_letters:
+                    # Failed too often in earlier runs, reported without another attempt
+                    attempts, last_error = dead_letters[job['key']][2:]
+                    logging.warning(f"Skipping {job['title']}: in the dead-letter list after {attempts} attempts ({last_error})")
+                    outcomes.append((job, False, None))
+                    summary['dead_letter'] += 1
+                else:
+                    waiting.append(job)
+            
+            # Drain the queue in rounds; failed jobs come back once their backoff has passed
+            while outcomes or waiting:
+                ready, waiting = self._due_jobs(waiting)
+                outcomes = itertools.chain(outcomes, self._run_units(self._download_units(self.job_queue.claim(ready))))
+                for job, success, error in outcomes:
+                    if success:
+                        self.job_queue.complete(job['key'])
+                    elif isinstance(error, DownloadCancelled):
+                        self.job_queue.release(job['key'])
+                    elif job['key'] not in dead_letters:
+                        transient = isinstance(error, NetworkUnavailable)
+                        delay = self.job_queue.fail(job['key'], error or "download failed", transient)
+                        if delay is not None:
+                            self.update_status(f"Will retry {job['title']} in {delay:.0f}s")
+                            summary['retried'] += 1
+                            waiting.append(job)
                             continue
-                        
-                        # Download the video
-                        self.update_status(f"Downloading: {video_title}")
-                        if download_from_drive(drive_url, output_path):
-                            # Update the status in the DataFrame
-                            df.at[index, 'Download Status'] = 'Downloaded'
-                            self.downloaded_videos.append({
-                                'Subject': subject,
-                                'Topic': topic,
-                                'Subtopic': subtopic,
-                                'Video Title': video_title,
-                                'Local Path': output_path
-                            })
+                        if not transient:
+                            summary['dead_letter'] += 1
+                    self._record_outcome(job, success, error, status_writer, duplicates, failed, summary)
+                outcomes = []
+        except KeyboardInterrupt:
+            # Let the running downloads stop at their next chunk, keeping their partial files
+            self.control.cancel()
+            raise
+        finally:
+            self.metrics.add_phase('network', time.perf_counter() - network_started)
+            # Save the processed sheets
+            status_writer.close()
+        
+        # Remember which rows are in sync; failed rows are retried next run
+        if self.incremental:
+            self._remove_rows(removed, catalog)
+            self.manifest.mark_synced([job for job in jobs if job['row_hash'] not in failed])
+            self.manifest.set_state('workbook_sha256', workbook_hash)
+            self.manifest.set_state('unsynced_rows', len(failed))
+        
+        self._report_metrics()
+        self.emit('summary', **summary)
+        return summary
+    
+    def _due_jobs(self, jobs):
+        """Split jobs into (ready, still waiting) by their backoff, waiting for the earliest one if none is ready."""
+        if not jobs:
+            return [], []
+        due = self.job_queue.due_times(job['key'] for job in jobs)
+        delay = min(due.get(job['key'], 0) for job in jobs) - time.time()
+        if delay > 0:
+            # Nothing is due yet; a cancel ends the wait and the jobs then stop at their first checkpoint
+            self.update_status(f"Waiting {delay:.0f}s to retry {len(jobs)} failed videos...")
+            if self.control.cancelled.wait(delay):
+                return jobs, []
+        now = time.time()
+        return ([job for job in jobs if due.get(job['key'], 0) <= now],
+                [job for job in jobs if due.get(job['key'], 0) > now])
+
+    def _record_outcome(self, job, success, error, status_writer, duplicates, failed, summary):
+        """Write the final status of a job (and the rows sharing its video) and count it in the summary."""
+        if not success:
+            failed.add(job['row_hash'])
+        if isinstance(error, DownloadCancelled):
+            status = 'Cancelled'
+            summary['cancelled'] += 1
+        elif error is not None and not isinstance(error, NetworkUnavailable):
+            logging.error(f"Error processing video {job['title']}: {str(error)}")
+            status = 'Error'
+            summary['errors'] += 1
+        elif success:
+            status = 'Downloaded'
+            summary['downloaded'] += 1
+            self.downloaded_videos.append({
+                'Subject': job['subject'],
+                'Topic': job['topic'],
+                'Subtopic': job['subtopic'],
+                'Video Title': job['title'],
+                'Local Path': job['output_path']
+            })
+        else:
+            status = 'Failed'
+            summary['failed'] += 1
+        if status in ('Failed', 'Error'):
+            self.manifest.record(job['key'], job['url'], job['output_path'], 'failed')
+        self.metrics.record_job(job, status=status)
+        status_writer.update(job, status)
+        self.emit('job', sheet=job['sheet'], row=int(job['index']), title=str(job['title']),
+                  path=job['output_path'], status=status, **self.metrics.job(job))
+        
+        for duplicate in duplicates.get(job['key'], []):
+            if success and duplicate['output_path'] != job['output_path']:
+                method = link_file(job['output_path'], duplicate['output_path'])
+                self.update_status(f"Linked duplicate video ({method}): {duplicate['title']}")
+                summary['linked'] += 1
+            else:
+                failed.add(duplicate['row_hash'])
+            status_writer.update(duplicate, status)
+            self.emit('job', sheet=duplicate['sheet'], row=int(duplicate['index']), title=str(duplicate['title']),
+                      path=duplicate['output_path'], status=status)
+
+    def _report_metrics(self):
+        """Log the run metrics, send them as a 'metrics' event and write the metrics file if configured."""
+        metrics = self.metrics.summary()
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in metrics['phases'].items())
+        logging.info(f"Run metrics: {metrics['jobs']} jobs, {metrics['bytes'] / 1048576:.1f} MB at "
+                     f"{metrics['throughput'] / 1048576:.2f} MB/s, {metrics['retries']} retries; {phases}")
+        self.emit('metrics', **metrics)
+        if self.metrics_path:
+            self.metrics.write(self.metrics_path)
+
+    def _changed_jobs(self, catalog, sheets):
+        """Diff the catalog against the last synced snapshot, returning (new or changed jobs, removed rows)."""
+        synced = self.manifest.synced_rows()
+        current = {job['row_hash'] for job in catalog}
+        _object_status_columns(sheets)
+        changed = []
+        for job in catalog:
+            if job['row_hash'] in synced:
+                sheets[job['sheet']].at[job['index'], 'Download Status'] = 'Unchanged'
+            else:
+                changed.append(job)
+        
+        # Rows of sheets that were not loaded this run are neither current nor removed
+        removed = {row_hash: row for row_hash, row in synced.items()
+                   if row_hash not in current and row[0] in sheets}
+        self.update_status(f"Sync: {len(changed)} new or changed rows, {len(removed)} removed rows, "
+                           f"{len(catalog) - len(changed)} unchanged")
+        return changed, removed
+
+    def _remove_rows(self, removed, catalog):
+        """Forget catalog rows that disappeared and optionally delete their videos.
+        
+        Runs after the downloads so that a video whose row merely changed has
+        already been moved to its new folder and is not deleted.
+        """
+        if self.delete_removed:
+            targets = {job['output_path'] for job in catalog}
+            keys = {job['key'] for job in catalog}
+            for sheet, file_id, path in removed.values():
+                if path not in targets and os.path.exists(path):
+                    os.remove(path)
+                    if file_id not in keys:
+                        self.manifest.record(file_id, None, path, 'removed')
+                    self.update_status(f"Deleted video removed from the catalog: {path}")
+        self.manifest.forget_rows(removed)
+
+    def _expand_playlists(self, jobs):
+        """Replace every YouTube playlist job by one job per video of the playlist."""
+        playlist_jobs = [job for job in jobs if is_youtube_playlist(job['url'])]
+        if not playlist_jobs:
+            return jobs
+        
+        expanded = []
+        with new_youtube_downloader(self.youtube_fragments) as ydl:
+            for job in jobs:
+                if not is_youtube_playlist(job['url']):
+                    expanded.append(job)
+                    continue
+                try:
+                    entries = expand_youtube_playlist(job['url'], ydl)
+                except Exception as e:
+                    logging.error(f"Could not expand YouTube playlist {job['url']}: {str(e)}")
+                    expanded.append(job)
+                    continue
+                self.update_status(f"Playlist {job['title']}: {len(entries)} videos")
+                for video_url, title in entries:
+                    expanded.append(dict(
+                        job,
+                        url=video_url,
+                        key=video_url,
+                        title=title,
+                        output_path=os.path.join(job['folder'], f"{safe_filename(title)}.mp4"),
+                        playlist_entry=True
+                    ))
+        return resolve_path_collisions(expanded)
+
+    def _pending_jobs(self, jobs, catalog=None):
+        """Return the jobs that still need a download, using the manifest to skip or relocate the rest.
+        
+        `catalog` is every row of the workbook; a video is only moved away from a
+        path that no catalog row points at anymore.
+        """
+        completed = self.manifest.completed()
+        targets = {}
+        for job in (catalog or []) + jobs:
+            targets.setdefault(job['key'], set()).add(job['output_path'])
+        
+        pending = []
+        for job in jobs:
+            key, output_path = job['key'], job['output_path']
+            if key in completed and not os.path.exists(completed[key][0]):
+                # Deleted since it was downloaded, fetch it again
+                logging.warning(f"{completed[key][0]} is missing, downloading it again")
+                self.manifest.record(key, job['url'], completed[key][0], 'missing')
+                del completed[key]
+            if key in completed:
+                known_path = completed[key][0]
+                if known_path == output_path:
+                    self.update_status(f"Video already exists: {job['title']}")
+                    continue
+                if known_path not in targets[key]:
+                    # The video moved in the spreadsheet, move it on disk instead of downloading it again
+                    shutil.move(known_path, output_path)
+                    self.manifest.move(key, output_path)
+                    completed[key] = (output_path, completed[key][1])
+                    self.update_status(f"Moved existing video: {job['title']}")
+                    continue
+                # Same Drive file listed under another folder too, link it instead of fetching it again
+                if not os.path.exists(output_path):
+                    method = link_file(known_path, output_path)
+                    self.update_status(f"Linked existing video ({method}): {job['title']}")
+                continue
+            if os.path.exists(output_path):
+                # A file the manifest does not know may be truncated: resume it as a partial
+                # download, which completes it or (416) confirms it without fetching it again
+                part_path = output_path + '.part'
+                if not os.path.exists(part_path) or os.path.getsize(output_path) > os.path.getsize(part_path):
+                    os.replace(output_path, part_path)
+                self.update_status(f"Verifying existing video: {job['title']}")
+            pending.append(job)
+        return pending
+
+    def _progress_reporter(self, job):
+        """Return a download progress callback that emits 'progress' events with the running byte total."""
+        def report(chunk_bytes, downloaded, total_size):
+            with self.progress_lock:
+                self.bytes_downloaded += chunk_bytes
+                bytes_downloaded = self.bytes_downloaded
+            self.emit('progress', title=str(job['title']), path=job['output_path'],
+                      downloaded=downloaded, total=total_size, bytes_downloaded=bytes_downloaded)
+        return report
+
+    def _download_units(self, jobs):
+        """Group jobs into scheduler units: one per Drive video, batches of YouTube videos.
+        
+        Each YouTube batch keeps the position of its first video, so YouTube rows
+        are interleaved with the Drive rows instead of queued after all of them.
+        """
+        units = []
+        batch = None
+        for job in jobs:
+            if not is_youtube_url(job['url']):
+                units.append({'url': job['url'], 'jobs': [job]})
+                continue
+            if batch is None or len(batch['jobs']) >= self.youtube_batch_size:
+                batch = {'url': job['url'], 'jobs': [], 'youtube': True}
+                units.append(batch)
+            batch['jobs'].append(job)
+        return units
+
+    def _run_units(self, units):
+        """Run the units on the scheduler and yield (job, success, error) for every job."""
+        queued_at = time.monotonic()
+        for unit in units:
+            unit['queued_at'] = queued_at
+        if self.engine == 'asyncio':
+            yield from self._run_units_async(units)
+            return
+        for unit, outcomes, error in self.scheduler.run(units, self._download_unit, self.control):
+            if error is not None:
+                outcomes = [(job, False, error) for job in unit['jobs']]
+            yield from outcomes
+
+    def _run_units_async(self, units):
+        """Run the units on an event loop in a helper thread and yield (job, success, error) for every job."""
+        import asyncio
+        
+        if not units:
+            return
+        results = queue.Queue()
+        
+        def run_loop():
+            try:
+                asyncio.run(self._download_units_async(units, results.put))
+            except Exception as e:
+                results.put(e)
+            finally:
+                results.put(None)
+        
+        Thread(target=run_loop, daemon=True).start()
+        reported = set()
+        while True:
+            outcomes = results.get()
+            if outcomes is None:
+                return
+            if isinstance(outcomes, Exception):
+                # The event loop itself failed (e.g. aiohttp missing), fail every unit not reported yet
+                outcomes = [(job, False, outcomes) for unit in units for job in unit['jobs']
+                            if job['output_path'] not in reported]
+            for job, success, error in outcomes:
+                reported.add(job['output_path'])
+                yield job, success, error
+
+    async def _download_units_async(self, units, report):
+        """Download every unit concurrently on the running event loop, passing each unit's outcomes to report."""
+        import asyncio
+        
+        scheduler = self.scheduler
+        slots = asyncio.Semaphore(scheduler.max_workers)
+        host_slots = {}
+        
+        async with new_async_http_session(limit=scheduler.max_workers) as session:
+            async def run_unit(unit):
+                host = urlparse(unit['url']).netloc.lower()
+                host_slot = host_slots.setdefault(host, asyncio.Semaphore(scheduler.per_host_limit))
+                # Wait for the host first so a busy host never holds a global slot
+                async with host_slot, slots:
+                    await asyncio.sleep(scheduler.rate_limiter.reserve())
+                    try:
+                        if unit.get('youtube'):
+                            # yt-dlp is blocking, run the batch in a worker thread
+                            outcomes = await asyncio.to_thread(self._download_unit, unit)
                         else:
-                            df.at[index, 'Download Status'] = 'Failed'
-                            
-                        # Add a small delay between downloads
-                        time.sleep(1)
-                        
+                            job = unit['jobs'][0]
+                            success = await self._download_job_async(job, session, queued_at=unit.get('queued_at'))
+                            outcomes = [(job, success, None)]
                     except Exception as e:
-                        logging.error(f"Error processing video {video_title}: {str(e)}")
-                        df.at[index, 'Download Status'] = 'Error'
-                
-                # Save the processed sheet
-                output_excel = f"{os.path.splitext(excel_path)[0]}_processed.xlsx"
-                with pd.ExcelWriter(output_excel, engine='openpyxl', mode='a' if os.path.exists(output_excel) else 'w') as writer:
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+                        outcomes = [(job, False, e) for job in unit['jobs']]
+                report(outcomes)
             
-            self.update_status("All videos have been downloaded and organized successfully!")
+            await asyncio.gather(*(run_unit(unit) for unit in units))
+
+    def _download_unit(self, unit):
+        if not unit.get('youtube'):
+            job = unit['jobs'][0]
+            return [(job, self._download_job(job, queued_at=unit.get('queued_at')), None)]
+        
+        # One yt-dlp instance (and metadata cache) for the whole batch
+        outcomes = []
+        jobs = unit['jobs']
+        with new_youtube_downloader(self.youtube_fragments) as ydl:
+            for position, job in enumerate(jobs):
+                try:
+                    outcomes.append((job, self._download_job(job, ydl, queued_at=unit.get('queued_at')), None))
+                except DownloadCancelled as e:
+                    outcomes.extend((rest, False, e) for rest in jobs[position:])
+                    break
+                except Exception as e:
+                    outcomes.append((job, False, e))
+        return outcomes
+
+    def _download_job(self, job, ydl=None, queued_at=None):
+        started = time.monotonic()
+        if queued_at is not None:
+            self.metrics.record_job(job, queue_wait=started - queued_at)
+        
+        # Jobs still queued when the run is cancelled end here without a request
+        self.control.checkpoint()
+        self._check_host(job)
+        self.update_status(f"Downloading: {job['title']}")
+        stats = {}
+        success = False
+        try:
+            success = download_video(job['url'], job['output_path'], ydl=ydl,
+                                     segments=self.segments, segment_threshold=self.segment_threshold,
+                                     progress_callback=self._progress_reporter(job), control=self.control,
+                                     stats=stats, chunk_size=self.chunk_size, write_buffer=self.write_buffer)
+        finally:
+            self._record_job_metrics(job, started, stats, success)
+        self._count_host_result(job, success, stats)
+        if success:
+            self._store_download(job, stats)
+        elif 'network_error' in stats:
+            # Reported apart from other failures so the job queue does not count it as an attempt
+            raise NetworkUnavailable(stats['network_error'])
+        return success
+
+    async def _download_job_async(self, job, session, queued_at=None):
+        """_download_job for the asyncio engine, sharing one aiohttp session."""
+        import asyncio
+        
+        started = time.monotonic()
+        if queued_at is not None:
+            self.metrics.record_job(job, queue_wait=started - queued_at)
+        
+        await self.control.async_checkpoint()
+        self._check_host(job)
+        self.update_status(f"Downloading: {job['title']}")
+        stats = {}
+        success = False
+        try:
+            success = await async_download_video(job['url'], job['output_path'], session=session,
+                                                 progress_callback=self._progress_reporter(job), control=self.control,
+                                                 stats=stats, chunk_size=self.chunk_size, write_buffer=self.write_buffer)
+        finally:
+            self._record_job_metrics(job, started, stats, success)
+        self._count_host_result(job, success, stats)
+        if success:
+            await asyncio.to_thread(self._store_download, job, stats)
+        elif 'network_error' in stats:
+            raise NetworkUnavailable(stats['network_error'])
+        return success
+
+    def _check_host(self, job):
+        """Fail a job without a request while its host is considered down.
+        
+        After HOST_FAILURE_LIMIT network failures in a row the host is skipped
+        for retry_delay seconds; the jobs due after that try it again.
+        """
+        host = urlparse(job['url']).netloc.lower()
+        failures, last_failure = self.host_failures.get(host, (0, 0))
+        if failures >= HOST_FAILURE_LIMIT and time.monotonic() - last_failure < self.job_queue.retry_delay:
+            raise NetworkUnavailable(f"{host} unreachable after {failures} failed downloads, not tried")
+
+    def _count_host_result(self, job, success, stats):
+        """Track network failures in a row per host; any other outcome resets the count."""
+        host = urlparse(job['url']).netloc.lower()
+        with self.progress_lock:
+            if not success and 'network_error' in stats:
+                self.host_failures[host] = (self.host_failures.get(host, (0, 0))[0] + 1, time.monotonic())
+            else:
+                self.host_failures.pop(host, None)
+
+    def _record_job_metrics(self, job, started, stats, success):
+        seconds = time.monotonic() - started
+        received = stats.get('bytes', 0)
+        if not received and success:
+            # yt-dlp does not report progress, count the finished file
+            received = os.path.getsize(job['output_path'])
+        self.metrics.record_job(job, seconds=seconds, bytes=received, retries=stats.get('retries', 0),
+                                throughput=received / seconds if seconds else 0.0,
+                                **({'ttfb': stats['ttfb']} if 'ttfb' in stats else {}))
+
+    def _store_download(self, job, stats):
+        """Record a finished download in the manifest, replacing it by a link if the same content is stored already."""
+        output_path = job['output_path']
+        sha256 = stats.get('sha256') or file_sha256(output_path)
+        
+        # Identical content already stored under another file ID: keep one copy on disk
+        same_content = self.manifest.find_sha256(sha256, job['key'])
+        if same_content and same_content != output_path and os.path.exists(same_content):
+            method = link_file(same_content, output_path)
+            logging.info(f"{output_path} has the same content as {same_content}, replaced by a {method}")
+        
+        self.manifest.record(job['key'], job['url'], output_path, 'done',
+                             size=os.path.getsize(output_path), sha256=sha256)
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Download and organize the videos listed in a KAU video spreadsheet without the GUI."
+    )
+    parser.add_argument('source', help="Google Drive/Sheets URL of the spreadsheet, or a local .xlsx file")
+    parser.add_argument('-o', '--output', required=True, help="Root folder for the downloaded videos")
+    parser.add_argument('-j', '--workers', type=int, default=4, help="Number of videos downloaded at once (default: 4)")
+    parser.add_argument('--per-host', type=int, default=2, help="Maximum concurrent downloads per host (default: 2)")
+    parser.add_argument('--rate-limit', type=float, default=2.0, help="Maximum downloads started per second, 0 for no limit (default: 2)")
+    parser.add_argument('--engine', choices=ENGINES, default='threads',
+                        help="Download engine: a thread pool (default) or one asyncio event loop for many concurrent streams")
+    parser.add_argument('--bandwidth-limit', type=parse_rate, metavar='RATE',
+                        help="Cap the combined download rate, e.g. 20M for 20 MB/s")
+    parser.add_argument('--office-hours', metavar='START-END',
+                        help="Weekday hours (e.g. 9-17) during which --office-hours-limit applies")
+    parser.add_argument('--office-hours-limit', type=parse_rate, metavar='RATE',
+                        help="Download rate cap during office hours, e.g. 5M")
+    parser.add_argument('--chunk-size', type=parse_rate, default=DEFAULT_CHUNK_SIZE, metavar='SIZE',
+                        help="Network read size per chunk (default: 256K)")
+    parser.add_argument('--include-sheet', action='append', default=[], metavar='PATTERN',
+                        help="Only process sheets matching this glob pattern (repeatable)")
+    parser.add_argument('--exclude-sheet', action='append', default=[], metavar='PATTERN',
+                        help="Skip sheets matching this glob pattern (repeatable)")
+    parser.add_argument('--max-attempts', type=int, default=3,
+                        help="Attempts per video before it goes to the dead-letter list (default: 3)")
+    parser.add_argument('--retry-delay', type=float, default=30.0, metavar='SECONDS',
+                        help="Wait before the first retry of a failed video, doubled for every further retry (default: 30)")
+    parser.add_argument('--retry-dead', action='store_true', help="Give the videos in the dead-letter list another set of attempts")
+    parser.add_argument('--shard', type=parse_shard, metavar='K/N',
+                        help="Only download shard K of N, e.g. 2/4; each node of a shared root folder runs one shard")
+    parser.add_argument('--shard-by', choices=SHARD_KEYS, default='file',
+                        help="Assign rows to shards by a hash of the Drive file ID (default) or of the sheet name")
+    parser.add_argument('--local-shards', type=int, metavar='N',
+                        help="Run all N shards as local processes and merge their statuses")
+    parser.add_argument('--merge-shards', type=int, metavar='N',
+                        help="Only merge the statuses of N shards into one _processed.xlsx")
+    parser.add_argument('--incremental', action='store_true', help="Only download rows that are new or changed since the last sync")
+    parser.add_argument('--delete-removed', action='store_true', help="With --incremental, delete videos whose rows were removed")
+    parser.add_argument('--status-log', action='store_true', help="Append every row status to a JSON Lines log next to the spreadsheet")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable progress events as JSON Lines on stdout")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="Write per-job and run metrics to FILE: Prometheus text if it ends in .prom, JSON otherwise")
+    parser.add_argument('--profile', metavar='FILE', help="Profile the run with cProfile and save the stats to FILE")
+    return parser
+
+def run_cli(argv=None):
+    """Run a headless download. Returns 0 on success, 1 if any video failed and 2 if the run could not complete."""
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    office_hours = None
+    if args.office_hours:
+        try:
+            office_hours = tuple(int(hour) for hour in args.office_hours.split('-'))
+        except ValueError:
+            office_hours = ()
+        if len(office_hours) != 2:
+            parser.error("--office-hours must look like START-END, e.g. 9-17")
+    if bool(args.office_hours) != bool(args.office_hours_limit):
+        parser.error("--office-hours and --office-hours-limit must be given together")
+    if args.shard and args.local_shards:
+        parser.error("--shard and --local-shards cannot be combined")
+    logging.info(f"Startup time: {(time.perf_counter() - _START_TIME) * 1000:.0f} ms")
+    print_lock = Lock()
+    
+    def print_event(event):
+        # Events arrive from the worker threads, keep each JSON line intact
+        with print_lock:
+            print(json.dumps(event, ensure_ascii=False, default=str), flush=True)
+    
+    options = dict(
+        max_workers=args.workers,
+        per_host_limit=args.per_host,
+        rate_limit=args.rate_limit,
+        incremental=args.incremental,
+        delete_removed=args.delete_removed,
+        status_log=args.status_log,
+        include_sheets=args.include_sheet,
+        exclude_sheets=args.exclude_sheet,
+        chunk_size=args.chunk_size,
+        bandwidth_limit=args.bandwidth_limit,
+        office_hours=office_hours,
+        office_hours_limit=args.office_hours_limit,
+        metrics_path=args.metrics,
+        engine=args.engine,
+        max_attempts=args.max_attempts,
+        retry_delay=args.retry_delay,
+        shard_by=args.shard_by
+    )
+    
+    try:
+        if args.merge_shards:
+            excel_path = args.source if os.path.isfile(args.source) else os.path.join(args.output, 'KAUvideos.xlsx')
+            merge_shard_statuses(excel_path, args.merge_shards, args.shard_by)
+            return 0
+        if args.local_shards:
+            summary = run_local_shards(args.source, args.output, args.local_shards, **options)
+            if args.json:
+                print_event({'event': 'summary', 'time': time.time(), **summary})
+            else:
+                print(", ".join(f"{name}: {count}" for name, count in summary.items()))
+            return 1 if summary['failed'] or summary['errors'] or summary['cancelled'] else 0
+        
+        downloader = VideoDownloader(
+            args.output,
+            event_callback=print_event if args.json else None,
+            shard=args.shard,
+            **options
+        )
+        if args.retry_dead:
+            logging.info(f"Re-queued {downloader.job_queue.requeue_dead()} videos from the dead-letter list")
+        run = downloader.process_workbook if os.path.isfile(args.source) else downloader.download_videos
+        if args.profile:
+            import cProfile
             
-        except Exception as e:
-            logging.error(f"Error downloading videos: {str(e)}")
-            raise
+            profiler = cProfile.Profile()
+            try:
+                summary = profiler.runcall(run, args.source)
+            finally:
+                profiler.dump_stats(args.profile)
+                logging.info(f"Profile saved to {args.profile}")
+        else:
+            summary = run(args.source)
+    except Exception as e:
+        logging.error(f"Download run failed: {str(e)}")
+        if args.json:
+            print_event({'event': 'error', 'message': str(e)})
+        return 2
+    
+    if not args.json:
+        print(", ".join(f"{name}: {count}" for name, count in summary.items()))
+    return 1 if summary['failed'] or summary['errors'] or summary['cancelled'] else 0
 
 def main():
+    # Lets the frozen executable start the processes of --local-shards
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+    
+    # Any command-line arguments select the headless mode, which never imports tkinter
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    
+    import tkinter as tk
+    
     root = tk.Tk()
     app = VideoDownloaderGUI(root)
+    root.after_idle(lambda: logging.info(f"Startup time: {(time.perf_counter() - _START_TIME) * 1000:.0f} ms"))
     root.mainloop()
 
 if __name__ == "__main__":
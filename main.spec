@@ -10,7 +10,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['gdown', 'tqdm', 'matplotlib', 'scipy', 'IPython', 'notebook', 'pytest'],
     noarchive=False,
     optimize=0,
 )